@@ -1,18 +1,54 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import importlib.util
+import os
+import random
+import re
+import threading
 import time
-import json
-import google.generativeai as genai
-from crewai import Agent, Task, Crew, Process
+import weakref
+from dataclasses import dataclass
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import diskcache
+import litellm
+from aiolimiter import AsyncLimiter
+from google.api_core.exceptions import (
+    InternalServerError, ResourceExhausted, ServiceUnavailable, TooManyRequests
+)
+from crewai import Agent, Task, Crew, Process, LLM
 from config import Config
+from schemas import PresentationBlueprint, PresentationContent, PresentationDesign
+from semantic_cache import SemanticCache
+from slide_renderer import TEMPLATE_VERSION, render_slides, wrap_slides
+from request_context import REQUEST_ID
 from scraper import google_search, scrape_webpage
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Configure Gemini API
-genai.configure(api_key=Config.GEMINI_API_KEY)
+# Part of every crew and presentation cache key. Crew keys already cover the
+# prompts, personas and schemas, so bump it for changes outside them (such as
+# how outputs are parsed), and for any prompt or schema change that finished
+# presentations should not outlive
+CREW_CACHE_VERSION = 1
 
-# Generation settings will be applied when creating the model
+def _schema_fingerprint(schema):
+    """
+    Return bytes identifying a pydantic output schema, or b'' for no schema.
+    """
+    if schema is None:
+        return b''
+    if hasattr(schema, 'model_json_schema'):
+        return orjson.dumps(schema.model_json_schema(), option=orjson.OPT_SORT_KEYS)
+    return str(schema).encode('utf-8')
+
+# Generation settings applied to every LLM
 DEFAULT_GENERATION_CONFIG = {
     "temperature": 0.7,
     "top_p": 0.8,
@@ -20,9 +56,67 @@ DEFAULT_GENERATION_CONFIG = {
     "max_output_tokens": 8192,
 }
 
+# Overload and network error messages that are worth retrying, matched in one pass.
+# Alternatives covered by a shorter one ("connection timeout" by "timeout") are
+# left out so the engine tries fewer branches at each position
+RETRYABLE_ERROR_RE = re.compile(
+    r"503|overloaded|unavailable|too many requests|rate limit|quota|timeout"
+    r"|network|dns|resolve|name resolution|connection (?:error|refused)",
+    re.IGNORECASE
+)
+
+# Provider exceptions that always mean overload, whatever their message says.
+# CrewAI calls Gemini through LiteLLM, which raises its own types
+RETRYABLE_EXCEPTIONS = (
+    ServiceUnavailable, ResourceExhausted, TooManyRequests, InternalServerError,
+    litellm.RateLimitError, litellm.ServiceUnavailableError, litellm.InternalServerError,
+    litellm.Timeout, litellm.APIConnectionError
+)
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+def is_retryable_error(e, error_str=None):
+    """
+    Return True if an error is an overload or network failure worth retrying.
+    Known exception types and HTTP status codes are checked first; the message
+    is only searched for errors that carry neither, such as ones CrewAI re-raises.
+    """
+    if isinstance(e, RETRYABLE_EXCEPTIONS):
+        return True
+    status_code = getattr(e, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    return bool(RETRYABLE_ERROR_RE.search(str(e) if error_str is None else error_str))
+
+class ProviderUnavailableError(Exception):
+    """
+    Raised when the AI provider stays unavailable for the whole generation budget.
+    """
+
+class InvalidPromptError(ValueError):
+    """
+    Raised when a prompt is empty or too long to generate a presentation from.
+    """
+
+# time.monotonic() by which the current generation must finish; retries never
+# sleep past it
+_generation_deadline = contextvars.ContextVar('generation_deadline', default=None)
+
+# Token counts of the crews run for the current generation, cached ones included
+_generation_tokens = contextvars.ContextVar('generation_tokens', default=None)
+
+def _count_tokens(crew_output):
+    """
+    Add a crew's token usage to the current generation's count, if one is kept.
+    """
+    counts = _generation_tokens.get()
+    if counts is not None:
+        counts.append(getattr(getattr(crew_output, 'token_usage', None), 'total_tokens', 0) or 0)
+
 def retry_with_backoff(func, max_retries=None, delay=None, backoff=None):
     """
     Retry decorator with exponential backoff for handling API overload errors.
+    Coroutine functions are retried with asyncio.sleep so the event loop keeps
+    serving other presentations while one of them is backing off.
     """
     if max_retries is None:
         max_retries = Config.MAX_RETRIES
@@ -30,37 +124,60 @@ def retry_with_backoff(func, max_retries=None, delay=None, backoff=None):
         delay = Config.RETRY_DELAY
     if backoff is None:
         backoff = Config.RETRY_BACKOFF
+    max_delay = Config.MAX_RETRY_DELAY
+    
+    def next_wait_time(attempt, prev_wait, total_wait, e):
+        """Return how long to wait before retrying, or re-raise if we should give up.
+        Uses decorrelated jitter: a random wait between delay and backoff times
+        the previous wait, so requests that failed together retry apart."""
+        error_str = str(e)
+        
+        # Check if it's a retryable error (overload or network issues)
+        if is_retryable_error(e, error_str):
+            deadline = _generation_deadline.get()
+            remaining = float('inf') if deadline is None else deadline - time.monotonic()
+            if attempt < max_retries and remaining > 0:
+                wait_time = min(random.uniform(delay, prev_wait * backoff), max_delay, remaining)
+                logger.warning("API/Network error (attempt %d/%d). Retrying in %.1f seconds...",
+                               attempt + 1, max_retries + 1, wait_time)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Error details: %s", error_str)
+                return wait_time
+            else:
+                logger.error("API/Network still unavailable after %d retries. Total wait time: %.1f seconds",
+                             attempt, total_wait)
+                raise e
+        else:
+            # For non-retryable errors, don't retry
+            logger.error("Non-retryable error: %s", error_str)
+            raise e
+    
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            wait_time, total_wait = delay, 0.0
+            for attempt in range(max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    wait_time = next_wait_time(attempt, wait_time, total_wait, e)
+                    total_wait += wait_time
+                    await asyncio.sleep(wait_time)
+            
+            return None
+        
+        return async_wrapper
     
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        wait_time, total_wait = delay, 0.0
         for attempt in range(max_retries + 1):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's a retryable error (overload or network issues)
-                is_retryable_error = any(keyword in error_str.lower() for keyword in [
-                    "503", "overloaded", "unavailable", "too many requests", "rate limit", "quota",
-                    "temporary failure in name resolution", "connection error", "timeout", 
-                    "network", "dns", "resolve", "connection refused", "connection timeout"
-                ])
-                
-                if is_retryable_error:
-                    if attempt < max_retries:
-                        wait_time = min(delay * (backoff ** attempt), Config.MAX_RETRY_DELAY)
-                        logger.warning(f"API/Network error (attempt {attempt + 1}/{max_retries + 1}). "
-                                     f"Retrying in {wait_time:.1f} seconds...")
-                        logger.info(f"Error details: {error_str}")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"API/Network still unavailable after {max_retries} retries. "
-                                   f"Total wait time: {sum(min(delay * (backoff ** i), Config.MAX_RETRY_DELAY) for i in range(max_retries)):.1f} seconds")
-                        raise e
-                else:
-                    # For non-retryable errors, don't retry
-                    logger.error(f"Non-retryable error: {error_str}")
-                    raise e
+                wait_time = next_wait_time(attempt, wait_time, total_wait, e)
+                total_wait += wait_time
+                time.sleep(wait_time)
         
         return None
     
@@ -70,38 +187,38 @@ def retry_with_backoff(func, max_retries=None, delay=None, backoff=None):
 def search_web_func(query: str) -> str:
     """Search the web using Google Custom Search API for a given query."""
     try:
-        logger.info(f"🔍 Searching web for: {query}")
+        logger.info("🔍 Searching web for: %s", query)
         results = google_search(query, num=8)
-        logger.info(f"✅ Found {len(results)} search results for: {query}")
-        return json.dumps({
+        logger.info("✅ Found %s search results for: %s", len(results), query)
+        return orjson.dumps({
             "query": query,
             "results": results,
             "total_found": len(results)
-        }, indent=2)
+        }).decode()
     except Exception as e:
-        logger.error(f"❌ Web search error for '{query}': {e}")
+        logger.error("❌ Web search error for '%s': %s", query, e)
         # Return mock data if API fails - but clearly indicate it's mock data
-        return json.dumps({
+        return orjson.dumps({
             "query": query,
             "error": str(e),
             "results": [],
             "note": "Search API not available, using topic-based content generation"
-        })
+        }).decode()
 
 def scrape_content_func(url: str) -> str:
     """Scrape content from a webpage URL."""
     try:
-        logger.info(f"📄 Scraping content from: {url}")
+        logger.info("📄 Scraping content from: %s", url)
         result = scrape_webpage(url)
-        logger.info(f"✅ Successfully scraped content from: {url}")
-        return json.dumps(result, indent=2)
+        logger.info("✅ Successfully scraped content from: %s", url)
+        return orjson.dumps(result).decode()
     except Exception as e:
-        logger.error(f"❌ Scraping error for {url}: {e}")
-        return json.dumps({"error": str(e), "url": url, "content": ""})
+        logger.error("❌ Scraping error for %s: %s", url, e)
+        return orjson.dumps({"error": str(e), "url": url, "content": ""}).decode()
 
 def analyze_topic_func(topic: str) -> str:
     """Analyze a topic and generate relevant research points when web search is not available."""
-    logger.info(f"🧠 Analyzing topic: {topic}")
+    logger.info("🧠 Analyzing topic: %s", topic)
     
     # Create topic-specific research structure
     analysis = {
@@ -117,8 +234,281 @@ def analyze_topic_func(topic: str) -> str:
         "content_focus": f"Generate content specifically about '{topic}' and not generic presentation advice"
     }
     
-    logger.info(f"✅ Topic analysis completed for: {topic}")
-    return json.dumps(analysis, indent=2)
+    logger.info("✅ Topic analysis completed for: %s", topic)
+    return orjson.dumps(analysis).decode()
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+# A crew run blocks its worker thread for every LLM call it makes, so crews get
+# a pool as large as the admission limits let run at once, and rendering and
+# embedding get their own instead of queuing behind them
+_crew_executor = ThreadPoolExecutor(
+    max_workers=Config.MAX_CONCURRENT_LLM * len({
+        Config.CREWAI_MODEL, Config.FALLBACK_MODEL, Config.PLANNER_MODEL,
+        Config.CONTENT_MODEL, Config.DESIGNER_MODEL
+    }),
+    thread_name_prefix='ppt-crew'
+)
+_cpu_executor = ThreadPoolExecutor(max_workers=Config.CPU_WORKERS, thread_name_prefix='ppt-cpu')
+
+def _run_in(executor, func, *args):
+    """
+    Run func in executor with the caller's context variables, like
+    asyncio.to_thread does on the default executor, and return its future.
+    """
+    return asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(contextvars.copy_context().run, func, *args)
+    )
+
+def _get_event_loop():
+    """
+    Return the background event loop shared by all synchronous callers,
+    starting it on first use.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name='ppt-crew-loop', daemon=True).start()
+    return _event_loop
+
+# Tasks nobody awaits; the loop only keeps weak references to tasks, so they
+# are held here until done
+_background_tasks = set()
+
+def _in_background(coro):
+    """
+    Run a coroutine as a task without waiting for it.
+    """
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def _notify_desktop(*args):
+    """
+    Show a desktop notification with notify-send, where it is available,
+    and reap the process once it exits.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "notify-send", *args,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+    except OSError as e:
+        logger.debug("Desktop notification unavailable: %s", e)
+        return
+    await process.wait()
+
+def _releaser(admitted):
+    """
+    Return a done callback for an abandoned crew run that releases the
+    admission limits it still holds.
+    """
+    def release(run):
+        if not run.cancelled():
+            # Nobody awaits the abandoned run, so its error is only logged
+            error = run.exception()
+            if error is not None:
+                logger.warning("Abandoned crew run failed: %s", error)
+        _in_background(admitted.aclose())
+    return release
+
+def _parse_llm_json(text):
+    """
+    Parse JSON returned by an LLM, tolerating markdown code fences and
+    surrounding prose. Returns None if no JSON object can be parsed.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    json_start = text.find('{')
+    json_end = text.rfind('}')
+    if json_start == -1 or json_end == -1:
+        return None
+    try:
+        return orjson.loads(text[json_start:json_end + 1])
+    except orjson.JSONDecodeError:
+        return None
+
+def _prompt_json(value):
+    """
+    Render an agent result for embedding in a prompt: structured values are
+    serialized with orjson, crew outputs use their raw text.
+    """
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    if hasattr(value, 'model_dump'):
+        return orjson.dumps(value.model_dump()).decode()
+    return getattr(value, 'raw', str(value))
+
+def _result_data(result):
+    """
+    Return a JSON agent result as a dict, or None if it can't be parsed.
+    Already-parsed results are returned as they are.
+    """
+    if isinstance(result, dict):
+        return result
+    data = _parse_llm_json(getattr(result, 'raw', str(result)))
+    return data if isinstance(data, dict) else None
+
+def _result_slides(result):
+    """
+    Return the slide dicts of a JSON agent result, or None if no slides can
+    be parsed from it.
+    """
+    data = _result_data(result)
+    slides = data.get('slides') if isinstance(data, dict) else None
+    if not isinstance(slides, list):
+        return None
+    return [slide for slide in slides if isinstance(slide, dict)]
+
+def _slide_structure(result):
+    """
+    Return the (slide_number, content_type) outline of a JSON agent result,
+    or None if no slides can be parsed from it.
+    """
+    slides = _result_slides(result)
+    if slides is None:
+        return None
+    return [(slide.get('slide_number'), slide.get('content_type')) for slide in slides]
+
+def _clip(value, limit):
+    text = str(value).strip()
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def _compact_research(result):
+    """
+    Shrink a research result to its highest importance themes and first facts,
+    with every text item clipped, as compact JSON. The research is read by
+    every later phase, so this keeps it from being re-sent at full length to
+    each of them. Returns None if the result isn't research JSON.
+    """
+    data = _result_data(result)
+    if data is None:
+        return None
+    limit = Config.RESEARCH_ITEM_CHARS
+    themes = [theme for theme in data.get('main_themes') or [] if isinstance(theme, dict)]
+    themes.sort(key=lambda theme: theme.get('importance') if isinstance(theme.get('importance'), (int, float)) else 0,
+                reverse=True)
+    facts = [fact for fact in data.get('key_facts') or [] if isinstance(fact, dict)]
+    compact = {
+        'researched_topic': _clip(data.get('researched_topic', ''), limit),
+        'main_themes': [
+            {
+                'theme': _clip(theme.get('theme', ''), limit),
+                'content': _clip(theme.get('content', ''), limit),
+                'key_points': [_clip(point, limit) for point in theme.get('key_points') or []][:5]
+            }
+            for theme in themes[:Config.RESEARCH_MAX_THEMES]
+        ],
+        'key_facts': [
+            {'fact': _clip(fact.get('fact', ''), limit), 'context': _clip(fact.get('context', ''), limit)}
+            for fact in facts[:Config.RESEARCH_MAX_FACTS]
+        ],
+        'suggested_slide_topics': [_clip(topic, limit) for topic in data.get('suggested_slide_topics') or []]
+    }
+    return orjson.dumps(compact).decode()
+
+def _render_result(design_result, content_result=None):
+    """
+    Render the slides of a design result from the slide template, taking
+    their text from content_result when given. Returns None if the design
+    can't be rendered.
+    """
+    return render_slides(
+        _result_data(design_result),
+        _result_data(content_result) if content_result is not None else None
+    )
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """
+    Static role, goal and backstory of an agent, shared by every PPTAgents.
+    """
+    role: str
+    goal: str
+    backstory: str
+
+_GENERATOR_SPEC = AgentSpec(
+    role='Presentation Generator',
+    goal='Transform the design specifications into a polished, interactive presentation',
+    backstory="""You are an expert presentation developer with years of experience in creating 
+            stunning digital presentations. You understand modern web technologies, visual design principles,
+            and how to create engaging, interactive presentations. Your skills include implementing smooth
+            transitions, responsive layouts, and ensuring the final presentation is both visually appealing
+            and functionally robust. You excel at converting complex design specifications into polished,
+            professional presentations that effectively communicate the intended message."""
+)
+
+_RESEARCHER_SPEC = AgentSpec(
+    role='Content Researcher',
+    goal='Research and gather specific information about the given topic, not generic presentation advice',
+    backstory="""You are an expert content researcher who specializes in gathering specific 
+            information about requested topics. You MUST focus on the exact topic provided by the user 
+            and gather real, factual information about that specific subject. You have access to web 
+            search capabilities to find current, relevant information. Your job is to research the 
+            SPECIFIC TOPIC requested, not to provide generic presentation advice or unrelated content. 
+            You ALWAYS start by analyzing the exact topic requested and gathering relevant facts and 
+            information about that specific subject."""
+)
+
+_PLANNER_SPEC = AgentSpec(
+    role='Presentation Planner',
+    goal='Analyze researched content and create an engaging presentation structure',
+    backstory="""You are a professional presentation strategist who excels at organizing 
+            information into clear, compelling narratives. You analyze provided research content 
+            to identify key themes and create a logical presentation structure. You know how to 
+            break down complex topics into digestible slides and ensure the presentation flows 
+            naturally while maintaining audience engagement. 
+            
+            You plan slide titles of at most 10 words, bullet point slides of at most 5-6 points 
+            and paragraph slides of at most 40-50 words, so every slide stays readable."""
+)
+
+_CONTENT_CREATOR_SPEC = AgentSpec(
+    role='Content Creator',
+    goal='Generate engaging and relevant plain-text content for each slide based on the presentation plan',
+    backstory="""You are a skilled content writer and researcher who specializes in creating 
+            presentation content. You have the ability to transform abstract concepts into clear, 
+            engaging text that resonates with audiences. You understand how to write compelling 
+            headlines, informative bullet points, and descriptive text that supports the overall 
+            presentation narrative. Your content is always well-researched, accurate, and tailored 
+            to the intended audience. 
+            
+            IMPORTANT: You NEVER use markdown formatting like **, *, __, _, ~~, or ` in your content. 
+            You write in plain text only, using clear language and proper sentence structure. 
+            For emphasis, you use capital letters or rephrase sentences. 
+            
+            You always count words and stay within these limits: slide titles at most 10 words, 
+            bullet_points at most 5-6 points of at most 10 words each, paragraph at most 40-50 words, 
+            two_column at most 50 words per column, title_only a single impactful title."""
+)
+
+_DESIGNER_SPEC = AgentSpec(
+    role='Presentation Designer',
+    goal='Create visually appealing and professional slide designs that enhance content delivery',
+    backstory="""You are a professional presentation designer with extensive experience in 
+            visual communication and graphic design. You understand color theory, typography, 
+            layout principles, and how to create slides that are both beautiful and functional. 
+            You know how to balance text and visuals, choose appropriate color schemes, and 
+            create layouts that guide the viewer's attention effectively. Your designs always 
+            maintain consistency and professionalism while being visually engaging."""
+)
+
+_ARCHITECT_SPEC = AgentSpec(
+    role='Presentation Architect',
+    goal='Turn research into a complete slide-by-slide plan with final content and design specifications',
+    backstory="""You are a presentation strategist, content writer and visual designer in one. 
+            You organize research into a clear, logical slide structure, write concise and factual 
+            slide content, and choose layouts, colors and typography that support that content. 
+            
+            IMPORTANT: You NEVER use markdown formatting like **, *, __, _, ~~, or ` in your content. 
+            You write in plain text only and keep bullet points concise and under 15 words each. 
+            You always answer with a single valid JSON object."""
+)
 
 class PPTAgents:
     """
@@ -131,127 +521,123 @@ class PPTAgents:
             self.model = Config.FALLBACK_MODEL if use_fallback_model else Config.CREWAI_MODEL
             self.use_fallback = use_fallback_model
             if use_fallback_model:
-                logger.info(f"Using fallback model: {self.model}")
+                logger.info("Using fallback model: %s", self.model)
             
-            # Create model instance with generation settings
-            self.model_instance = genai.GenerativeModel(
-                self.model,
-                generation_config=DEFAULT_GENERATION_CONFIG
-            )
-            logger.info(f"Successfully initialized model: {self.model}")
+            # Shared by the agents that need no output schema
+            self.llm = self._make_llm(self.model)
+            # Same model constrained to the full design schema, for the single-pass planner
+            self.json_llm = self._make_llm(self.model, response_format=PresentationDesign)
+            
+            # Planning and design are schema-filling, so they can run on a cheaper
+            # model; the fallback keeps everything on the single fallback model
+            self.planner_model = self.model if use_fallback_model else Config.PLANNER_MODEL
+            self.content_model = self.model if use_fallback_model else Config.CONTENT_MODEL
+            self.designer_model = self.model if use_fallback_model else Config.DESIGNER_MODEL
+            # The planner and content creator decode straight into their schemas
+            self.planner_llm = self._make_llm(self.planner_model, temperature=Config.STRUCTURED_TEMPERATURE,
+                                              response_format=PresentationBlueprint)
+            self.content_llm = self._make_llm(self.content_model, response_format=PresentationContent)
+            self.designer_llm = self._make_llm(self.designer_model, temperature=Config.STRUCTURED_TEMPERATURE)
+            logger.info("Successfully initialized model: %s", self.model)
         except Exception as e:
-            logger.error(f"Error initializing agent model: {e}")
+            logger.error("Error initializing agent model: %s", e)
             raise
-            
-    def presentation_generator_agent(self):
+
+    @staticmethod
+    def _make_llm(model, temperature=DEFAULT_GENERATION_CONFIG["temperature"], **params):
         """
-        Presentation Generator Agent: Creates the final presentation output from the content and design specifications.
+        Build a CrewAI LLM with the default generation settings.
         """
-        return Agent(
-            role='Presentation Generator',
-            goal='Transform the design specifications into a polished, interactive presentation',
-            backstory="""You are an expert presentation developer with years of experience in creating 
-            stunning digital presentations. You understand modern web technologies, visual design principles,
-            and how to create engaging, interactive presentations. Your skills include implementing smooth
-            transitions, responsive layouts, and ensuring the final presentation is both visually appealing
-            and functionally robust. You excel at converting complex design specifications into polished,
-            professional presentations that effectively communicate the intended message.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=getattr(self, 'model_instance', self.model)  # Fallback to self.model if model_instance isn't available
+        return LLM(
+            model=model,
+            temperature=temperature,
+            top_p=DEFAULT_GENERATION_CONFIG["top_p"],
+            max_tokens=DEFAULT_GENERATION_CONFIG["max_output_tokens"],
+            **params
         )
-    
-    def content_researcher_agent(self):
+
+    @staticmethod
+    def _build_agent(spec, llm):
         """
-        Content Researcher Agent: Searches and analyzes web content to create presentation structure.
+        Build a CrewAI Agent from its static spec and the LLM it runs on.
         """
         return Agent(
-            role='Content Researcher',
-            goal=f'Research and gather specific information about the given topic, not generic presentation advice',
-            backstory="""You are an expert content researcher who specializes in gathering specific 
-            information about requested topics. You MUST focus on the exact topic provided by the user 
-            and gather real, factual information about that specific subject. You have access to web 
-            search capabilities to find current, relevant information. Your job is to research the 
-            SPECIFIC TOPIC requested, not to provide generic presentation advice or unrelated content. 
-            You ALWAYS start by analyzing the exact topic requested and gathering relevant facts and 
-            information about that specific subject.""",
-            verbose=True,
+            role=spec.role,
+            goal=spec.goal,
+            backstory=spec.backstory,
+            verbose=Config.CREWAI_VERBOSE,
             allow_delegation=False,
-            llm=getattr(self, 'model_instance', self.model)
+            llm=llm
         )
 
+    def presentation_generator_agent(self):
+        return self._presentation_generator
+
+    def content_researcher_agent(self):
+        return self._content_researcher
+
     def planner_agent(self):
+        return self._planner
+
+    def content_creator_agent(self):
+        return self._content_creator
+
+    def designer_agent(self):
+        return self._designer
+
+    def unified_agent(self):
+        return self._unified
+
+    # Agents have immutable configuration, so each is built on first use and
+    # reused; a pipeline that never reaches an agent never builds it
+    @functools.cached_property
+    def _presentation_generator(self):
+        """
+        Presentation Generator Agent: Creates the final presentation output from the content and design specifications.
+        """
+        return self._build_agent(_GENERATOR_SPEC, self.llm)
+    
+    @functools.cached_property
+    def _content_researcher(self):
+        """
+        Content Researcher Agent: Searches and analyzes web content to create presentation structure.
+        """
+        return self._build_agent(_RESEARCHER_SPEC, self.llm)
+
+    @functools.cached_property
+    def _planner(self):
         """
         Planner Agent: Creates presentation structure based on researched content.
         """
-        return Agent(
-            role='Presentation Planner',
-            goal='Analyze researched content and create an engaging presentation structure',
-            backstory="""You are a professional presentation strategist who excels at organizing 
-            information into clear, compelling narratives. You analyze provided research content 
-            to identify key themes and create a logical presentation structure. You know how to 
-            break down complex topics into digestible slides and ensure the presentation flows 
-            naturally while maintaining audience engagement.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=getattr(self, 'model_instance', self.model)
-        )
+        return self._build_agent(_PLANNER_SPEC, self.planner_llm)
     
-    def content_creator_agent(self):
+    @functools.cached_property
+    def _content_creator(self):
         """
         Content Creator Agent: Generates actual textual content for each slide based on the blueprint.
         """
-        return Agent(
-            role='Content Creator',
-            goal='Generate engaging and relevant plain-text content for each slide based on the presentation plan',
-            backstory="""You are a skilled content writer and researcher who specializes in creating 
-            presentation content. You have the ability to transform abstract concepts into clear, 
-            engaging text that resonates with audiences. You understand how to write compelling 
-            headlines, informative bullet points, and descriptive text that supports the overall 
-            presentation narrative. Your content is always well-researched, accurate, and tailored 
-            to the intended audience. 
-            
-            IMPORTANT: You NEVER use markdown formatting like **, *, __, _, ~~, or ` in your content. 
-            You write in plain text only, using clear language and proper sentence structure. 
-            For emphasis, you use capital letters or rephrase sentences. You keep bullet points 
-            concise and under 15 words each.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.model
-        )
+        return self._build_agent(_CONTENT_CREATOR_SPEC, self.content_llm)
     
-    def designer_agent(self):
+    @functools.cached_property
+    def _designer(self):
         """
         Designer Agent: Defines visual presentation, layout, and styling for each slide.
         """
-        return Agent(
-            role='Presentation Designer',
-            goal='Create visually appealing and professional slide designs that enhance content delivery',
-            backstory="""You are a professional presentation designer with extensive experience in 
-            visual communication and graphic design. You understand color theory, typography, 
-            layout principles, and how to create slides that are both beautiful and functional. 
-            You know how to balance text and visuals, choose appropriate color schemes, and 
-            create layouts that guide the viewer's attention effectively. Your designs always 
-            maintain consistency and professionalism while being visually engaging.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.model
-        )
+        return self._build_agent(_DESIGNER_SPEC, self.designer_llm)
 
-class PPTTasks:
-    """
-    Defines all the tasks that agents will perform in the PPT generation pipeline.
-    """
-    
-    def research_task(self, agent, topic, num_slides):
+    @functools.cached_property
+    def _unified(self):
         """
-        Task for the Content Researcher Agent to gather and analyze web content.
+        Presentation Architect Agent: Plans, writes and designs every slide in a single pass.
         """
-        # Ensure num_slides is an integer
-        num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
-        
-        return Task(
-            description=f'''
+        return self._build_agent(_ARCHITECT_SPEC, self.json_llm)
+
+@functools.lru_cache(maxsize=256)
+def _research_description(topic, num_slides):
+    """
+    Build the research task prompt once per (topic, num_slides) pair.
+    """
+    return f'''
             CRITICAL MISSION: Research and gather specific information about "{topic}" ONLY.
             
             You are researching: "{topic}"
@@ -320,23 +706,16 @@ class PPTTasks:
             }}
             
             CRITICAL: Your research must be about "{topic}" specifically. Do not generate content about presentations, public speaking, or communication skills.
-            ''',
-            agent=agent,
-            expected_output=f"Comprehensive factual research specifically about '{topic}'"
-        )
+            '''
 
-    def planning_task(self, agent, research_result, num_slides):
-        """
-        Task for the Planner Agent to create presentation structure from research.
-        """
-        # Ensure num_slides is an integer
-        num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
-        
-        return Task(
-            description=f"""
+# Stands in for an upstream result that a task reads from its context instead
+FROM_CONTEXT = "(provided in the context below)"
+
+# Static task prompts, filled in per call with str.format
+_PLANNING_TEMPLATE = """
             Create a {num_slides}-slide presentation structure based ONLY on the research data provided.
             
-            Research Data: {research_result}
+            Research Data: {research_data}
             
             CRITICAL RULES:
             1. Use ONLY the topic and information from the research data
@@ -345,119 +724,34 @@ class PPTTasks:
             4. Base slide titles and content on the research themes and facts
             5. Each slide must relate to the specific topic researched
             
-            CONTENT LENGTH PLANNING:
-            6. Plan slide titles to be ≤ 10 words maximum
-            7. For bullet_points content type: plan for 5-6 bullet points maximum
-            8. For paragraph content type: plan for 40-50 words maximum
-            9. Ensure content fits slide dimensions and readability
-            
             Slide Distribution Strategy:
             - Slide 1: Introduction to the specific topic
-            - Slides 2-{num_slides-1}: Main themes/aspects from research
+            - Slides 2-{last_theme_slide}: Main themes/aspects from research
             - Slide {num_slides}: Conclusion/summary of the topic
-            
-            Output Format (JSON ONLY):
-            {{
-                "presentation_title": "Title based on researched topic",
-                "presentation_description": "Description of the specific topic",
-                "target_topic": "The exact topic researched",
-                "total_slides": {num_slides},
-                "slides": [
-                    {{
-                        "slide_number": 1,
-                        "title": "Title based on research theme",
-                        "subtitle": "Subtitle related to the topic",
-                        "content_type": "title_only|bullet_points|paragraph|two_column",
-                        "description": "What this slide covers about the topic",
-                        "research_theme": "Which research theme this slide covers",
-                        "key_points": ["Points from research data"],
-                        "sources": ["Sources from research"]
-                    }}
-                ]
-            }}
-            """,
-            agent=agent,
-            expected_output="Presentation structure based ONLY on the researched topic"
-        )
-    
-    def content_creation_task(self, agent, planning_result, research_data):
-        """
-        Task for the Content Creator Agent to generate content for each slide based on research and planning.
-        """
-        return Task(
-            description=f"""
+            """
+
+# The content and design prompts end with the research and then their own
+# slides, so chunks of one deck that carry the research inline share a
+# prefix that Gemini caches implicitly
+_CONTENT_TEMPLATE = """
             Generate specific content for each slide using ONLY the research data and planning structure provided.
             
-            Planning Structure: {planning_result}
-            Research Data: {research_data}
-            
             STRICT CONTENT RULES:
             1. Use ONLY information from the research data provided
             2. Do NOT create generic presentation advice or tips
             3. Focus on the specific topic that was researched
             4. Each slide must contain factual information about the topic
             5. Use research themes, facts, and sources provided
-            6. Content must be plain text - NO markdown formatting
-            
-            CONTENT LENGTH CONSTRAINTS:
-            7. Slide titles: Maximum 10 words per title
-            8. Bullet points: Maximum 5-6 bullet points per slide
-            9. Paragraphs: Maximum 40-50 words per paragraph
-            10. Keep content concise to ensure proper slide formatting and readability
-            
-            For each slide, create content that:
-            - Relates directly to the researched topic
-            - Uses facts and themes from the research data
-            - Includes specific information, not generic advice
-            - Cites sources when using specific facts
-            - STRICTLY FOLLOWS LENGTH LIMITS (count words carefully!)
-            - Prioritizes clarity and conciseness for slide readability
+            6. Cite sources when using specific facts
             
-            Content Types:
-            - bullet_points: Use research facts as bullet points (MAX 5-6 points, each ≤ 10 words)
-            - paragraph: Write paragraphs using research information (MAX 40-50 words per paragraph)
-            - title_only: Create impactful titles about the topic (MAX 10 words)
-            - two_column: Compare aspects from research data (each column ≤ 50 words)
-            
-            Output Format (JSON):
-            {{
-                "presentation_title": "Title from planning (≤ 10 words)",
-                "topic_focus": "The specific topic researched",
-                "slides": [
-                    {{
-                        "slide_number": 1,
-                        "title": "Slide title from planning (≤ 10 words)",
-                        "subtitle": "Subtitle if needed (≤ 8 words)",
-                        "content_type": "From planning structure",
-                        "main_content": "Content based on research data (follow length constraints by type)",
-                        "sources": ["Sources from research data"],
-                        "research_basis": "Which research theme this content is based on"
-                    }}
-                ]
-            }}
-            
-            CONTENT LENGTH EXAMPLES:
-            - Title: "AI Impact on Modern Healthcare" (5 words ✓)
-            - Bullet Point: "• Reduces diagnosis time by 40%" (6 words ✓)
-            - Paragraph: "Machine learning algorithms analyze medical data faster than traditional methods, improving patient outcomes significantly across multiple healthcare sectors." (19 words ✓)
+            Research Data: {research_data}
             
-            ALWAYS count words and stay within limits!
-            """,
-            agent=agent,
-            expected_output="Slide content based strictly on research data about the specific topic"
-        )
-    
-    def design_task(self, agent, content_result, research_data):
-        """
-        Task for the Designer Agent to define visual styling and layout using research insights.
-        """
-        return Task(
-            description=f"""
+            Planning Structure: {planning_result}
+            """
+
+_DESIGN_TEMPLATE = """
             Define the visual design and layout for a research-backed presentation.
             
-            Content Structure: {content_result}
-            Research Data: {research_data}
-            
             For each slide:
             1. Choose layout based on content type and research data
             2. Determine appropriate visual elements:
@@ -495,20 +789,43 @@ class PPTTasks:
                - Content-to-whitespace ratio
                - Text-to-visual balance
                - Consistent alignment
-            """,
-            agent=agent,
-            expected_output="Complete JSON with content and comprehensive design specifications"
-        )
+            
+            Research Data: {research_data}
+            
+            Content Structure: {content_result}
+            """
 
-    def presentation_generation_task(self, agent, design_result):
-        """
-        Task for the Presentation Generator Agent to create the final presentation.
-        """
-        return Task(
-            description=f'''
-            Create individual HTML files for each slide with enhanced visual design and interactive elements.
+_UNIFIED_TEMPLATE = """
+            Create a complete {num_slides}-slide presentation based ONLY on the research data provided:
+            plan the structure, write the final slide content and define the visual design in one pass.
+            
+            Research Data: {research_data}
+            
+            STRUCTURE RULES:
+            1. Use ONLY the topic and information from the research data
+            2. Do NOT add generic presentation advice
+            3. Slide 1 introduces the topic, slides 2-{last_theme_slide} cover the main research themes,
+               slide {num_slides} concludes
+            
+            CONTENT RULES:
+            4. Content must be plain text - NO markdown formatting
+            5. Slide titles: Maximum 10 words per title
+            6. Bullet points: Maximum 5-6 bullet points per slide, each ≤ 10 words
+            7. Paragraphs: Maximum 40-50 words per paragraph
+            8. two_column: each column ≤ 50 words
+            9. Cite sources from the research data when using specific facts
+            
+            DESIGN RULES:
+            10. Choose the layout from the content type and the research data
+            11. Use charts for statistics, icons for key concepts, diagrams for processes
+            12. Keep one cohesive, professional color scheme and typography across all slides
+            """
 
-            Design Specifications: {design_result}
+# The per-call design and content come last, so the static instructions before
+# them form a prefix shared by every generator call that Gemini caches implicitly
+_GENERATION_TEMPLATE = '''
+            Write the HTML markup of each slide with enhanced visual design and interactive elements,
+            following the Design Specifications at the end.
 
             CRITICAL REQUIREMENTS:
 
@@ -520,9 +837,9 @@ class PPTTasks:
 
             1. Enhanced Visual Structure:
                - Create stunning, modern slide layouts with visual elements
-               - Use the 16:9 aspect ratio (1920x1080px) effectively
+               - Slides are shown at a 16:9 aspect ratio (1920x1080px), use the space effectively
                - Include visual design elements where appropriate
-               - Each slide must be a self-contained HTML file
+               - Write only the markup of each slide; the page, its <head> and all CSS are added for you
                - No JavaScript or external resources
 
             2. Advanced Content Layout:
@@ -534,7 +851,6 @@ class PPTTasks:
                  * bullet-points for lists (with visual bullets)
                  * paragraph for text (with visual cards when appropriate)
                  * two-column for side-by-side content
-                 * numbered-list for steps (with visual numbers)
                  * quote for quotations (with visual styling)
                  * center for title slides (centered content)
 
@@ -542,183 +858,21 @@ class PPTTasks:
                - Use .card divs for important information blocks
                - Use .visual-element spans for key concepts
                - Add .center class for title slides
+               - Use .source-citation for sources
                - Include visual separators and spacing
 
-            4. Enhanced HTML Template Structure:
-               Use this exact template with embedded CSS for each slide:
+            4. Slide Markup Structure:
+               Use this exact structure for each slide:
                
                ```html
-               <!DOCTYPE html>
-               <html>
-               <head>
-                   <meta charset="UTF-8">
-                   <title>Slide [NUMBER]</title>
-                   <style>
-                       * {{
-                           box-sizing: border-box;
-                           margin: 0;
-                           padding: 0;
-                       }}
-                       
-                       body {{
-                           font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                           width: 1920px;
-                           height: 1080px;
-                           margin: 0;
-                           padding: 0;
-                           background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                           color: #333;
-                           overflow: hidden;
-                       }}
-                       
-                       .slide {{
-                           width: 100%;
-                           height: 100%;
-                           display: flex;
-                           align-items: center;
-                           justify-content: center;
-                           padding: 60px;
-                           position: relative;
-                       }}
-                       
-                       .slide-content {{
-                           background: rgba(255, 255, 255, 0.95);
-                           border-radius: 20px;
-                           padding: 60px;
-                           box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-                           max-width: 1400px;
-                           width: 100%;
-                           position: relative;
-                       }}
-                       
-                       .slide-title {{
-                           font-size: 3.5rem;
-                           font-weight: bold;
-                           color: #2c3e50;
-                           margin-bottom: 30px;
-                           text-align: center;
-                           line-height: 1.2;
-                       }}
-                       
-                       .slide-body {{
-                           font-size: 1.8rem;
-                           line-height: 1.6;
-                           color: #34495e;
-                       }}
-                       
-                       .center {{
-                           text-align: center;
-                           display: flex;
-                           flex-direction: column;
-                           justify-content: center;
-                           align-items: center;
-                           height: 100%;
-                       }}
-                       
-                       .card {{
-                           background: #f8f9fa;
-                           border-radius: 15px;
-                           padding: 30px;
-                           margin: 20px 0;
-                           border-left: 5px solid #3498db;
-                           box-shadow: 0 5px 15px rgba(0, 0, 0, 0.08);
-                       }}
-                       
-                       .visual-element {{
-                           display: inline-block;
-                           background: linear-gradient(45deg, #667eea, #764ba2);
-                           color: white;
-                           padding: 8px 16px;
-                           border-radius: 20px;
-                           font-weight: bold;
-                           font-size: 1.6rem;
-                           margin: 5px;
-                       }}
-                       
-                       .bullet-points {{
-                           list-style: none;
-                           padding: 0;
-                       }}
-                       
-                       .bullet-points li {{
-                           margin: 20px 0;
-                           padding-left: 40px;
-                           position: relative;
-                           font-size: 1.6rem;
-                       }}
-                       
-                       .bullet-points li::before {{
-                           content: "●";
-                           color: #3498db;
-                           font-size: 2rem;
-                           position: absolute;
-                           left: 0;
-                           top: -2px;
-                       }}
-                       
-                       .two-column {{
-                           display: grid;
-                           grid-template-columns: 1fr 1fr;
-                           gap: 40px;
-                           align-items: start;
-                       }}
-                       
-                       h2 {{
-                           font-size: 2.5rem;
-                           color: #667eea;
-                           margin-bottom: 20px;
-                           text-align: center;
-                       }}
-                       
-                       h3 {{
-                           font-size: 2rem;
-                           color: #764ba2;
-                           margin-bottom: 15px;
-                       }}
-                       
-                       p {{
-                           margin-bottom: 15px;
-                           text-align: justify;
-                       }}
-                       
-                       .quote {{
-                           font-style: italic;
-                           font-size: 2rem;
-                           color: #555;
-                           text-align: center;
-                           position: relative;
-                           padding: 20px;
-                       }}
-                       
-                       .quote::before {{
-                           content: """;
-                           font-size: 4rem;
-                           color: #3498db;
-                           position: absolute;
-                           top: -10px;
-                           left: -10px;
-                       }}
-                       
-                       .source-citation {{
-                           text-align: right;
-                           font-size: 1.2rem;
-                           color: #7f8c8d;
-                           margin-top: 15px;
-                           font-style: normal;
-                       }}
-                   </style>
-               </head>
-               <body>
-                   <div class="slide">
-                       <div class="slide-content">
-                           <h1 class="slide-title">[TITLE]</h1>
-                           <div class="slide-body">
-                               [VISUALLY ENHANCED CONTENT BASED ON TYPE]
-                           </div>
+               <div class="slide">
+                   <div class="slide-content">
+                       <h1 class="slide-title">[TITLE]</h1>
+                       <div class="slide-body">
+                           [VISUALLY ENHANCED CONTENT BASED ON TYPE]
                        </div>
                    </div>
-               </body>
-               </html>
+               </div>
                ```
 
             5. Enhanced Content Type Examples:
@@ -781,7 +935,7 @@ class PPTTasks:
                - Maintain readability and balance
                - Use cards for important information blocks
                - Keep consistent visual hierarchy
-               - The CSS is already provided in the template above - USE IT EXACTLY
+               - Styling comes from the classes above - do NOT write <style>, style attributes, <head> or <html>
                - Clean, semantic HTML structure
 
             7. Content Guidelines:
@@ -791,8 +945,7 @@ class PPTTasks:
                - Use visual elements to break up text
                - Add source citations for factual content
 
-            8. CRITICAL: You MUST use the HTML template structure above INCLUDING the <style> section.
-               Each slide should be a complete HTML file with embedded CSS styling.
+            8. CRITICAL: You MUST use the slide markup structure above, starting at <div class="slide">.
 
             Format your response as a series of HTML code blocks, one for each slide:
 
@@ -807,9 +960,110 @@ class PPTTasks:
             ```
 
             And so on for each slide.
-            ''',
+
+            Design Specifications: {design_result}
+{content_section}'''
+
+class PPTTasks:
+    """
+    Defines all the tasks that agents will perform in the PPT generation pipeline.
+    """
+    
+    def research_task(self, agent, topic, num_slides):
+        """
+        Task for the Content Researcher Agent to gather and analyze web content.
+        """
+        # Ensure num_slides is an integer
+        num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
+        
+        return Task(
+            description=_research_description(topic, num_slides),
+            agent=agent,
+            expected_output=f"Comprehensive factual research specifically about '{topic}'"
+        )
+
+    def planning_task(self, agent, num_slides):
+        """
+        Task for the Planner Agent to create presentation structure from research.
+        The research is read from the task's context.
+        """
+        # Ensure num_slides is an integer
+        num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
+        
+        return Task(
+            description=_PLANNING_TEMPLATE.format(
+                num_slides=num_slides, last_theme_slide=num_slides - 1, research_data=FROM_CONTEXT
+            ),
             agent=agent,
-            expected_output="A single HTML file containing the complete presentation."
+            expected_output="Presentation structure based ONLY on the researched topic",
+            output_pydantic=PresentationBlueprint
+        )
+    
+    def content_creation_task(self, agent, planning_result=FROM_CONTEXT, research_data=FROM_CONTEXT):
+        """
+        Task for the Content Creator Agent to generate content for each slide based on research and planning.
+        The research and the plan are read from the task's context unless given.
+        """
+        return Task(
+            description=_CONTENT_TEMPLATE.format(
+                planning_result=_prompt_json(planning_result), research_data=_prompt_json(research_data)
+            ),
+            agent=agent,
+            expected_output="Slide content based strictly on research data about the specific topic",
+            output_pydantic=PresentationContent
+        )
+    
+    def design_task(self, agent, content_result=FROM_CONTEXT, research_data=FROM_CONTEXT):
+        """
+        Task for the Designer Agent to define visual styling and layout using research insights.
+        The research and the content are read from the task's context unless given.
+        """
+        return Task(
+            description=_DESIGN_TEMPLATE.format(
+                content_result=_prompt_json(content_result), research_data=_prompt_json(research_data)
+            ),
+            agent=agent,
+            expected_output="Complete JSON with content and comprehensive design specifications"
+        )
+
+    def unified_task(self, agent, num_slides):
+        """
+        Task for the Presentation Architect Agent to plan, write and design all slides at once.
+        Produces the same JSON the designer would, so it feeds the generation task directly.
+        The research is read from the task's context.
+        """
+        # Ensure num_slides is an integer
+        num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
+        
+        return Task(
+            description=_UNIFIED_TEMPLATE.format(
+                num_slides=num_slides, last_theme_slide=num_slides - 1, research_data=FROM_CONTEXT
+            ),
+            agent=agent,
+            expected_output="Complete JSON with content and comprehensive design specifications",
+            output_pydantic=PresentationDesign
+        )
+
+    def presentation_generation_task(self, agent, design_result=FROM_CONTEXT, content_result=None):
+        """
+        Task for the Presentation Generator Agent to create the final presentation.
+        When content_result is given, slide text comes from it and styling from design_result.
+        Pass FROM_CONTEXT for either when it is read from the task's context.
+        """
+        content_section = ""
+        if content_result is not None:
+            content_section = f"""
+            Slide Content: {_prompt_json(content_result)}
+
+            Use the slide text from Slide Content and the layout and styling from Design Specifications.
+"""
+
+        return Task(
+            description=_GENERATION_TEMPLATE.format(
+                design_result=_prompt_json(design_result), content_section=content_section
+            ),
+            agent=agent,
+            expected_output="One ```html code block of slide markup per slide, in slide order."
         )
     
     @staticmethod
@@ -861,55 +1115,458 @@ class PPTTasks:
         
         return len(errors) == 0, errors
 
+# PPTAgents keyed by (model, use_fallback_model); tasks hold no state, so one instance serves everyone
+_agents_registry = {}
+_agents_registry_lock = threading.Lock()
+_tasks = PPTTasks()
+
+
+def get_agents(use_fallback_model=False):
+    """
+    Return the process-wide PPTAgents for the primary or fallback model,
+    building it on first use so every PPTCrew shares the same agents.
+    """
+    key = (Config.FALLBACK_MODEL if use_fallback_model else Config.CREWAI_MODEL, use_fallback_model)
+    with _agents_registry_lock:
+        if key not in _agents_registry:
+            _agents_registry[key] = PPTAgents(use_fallback_model)
+        return _agents_registry[key]
+
+
+@dataclass
+class ModelLimits:
+    """
+    Admission limits for crew runs on one model.
+    """
+    slots: asyncio.Semaphore
+    rate: AsyncLimiter
+    cooldown_until: float = 0.0
+
 class PPTCrew:
     """
     Orchestrates the AI agents in the presentation creation process.
     """
     
     def __init__(self, use_fallback_model=False):
-        self.agents = PPTAgents(use_fallback_model)
-        self.tasks = PPTTasks()  # Initialize tasks instance
+        # Build both agent sets up front so switching to the fallback model
+        # under load costs nothing
+        self.agents = get_agents(use_fallback_model)
+        self.fallback_agents = get_agents(True)
+        self.tasks = _tasks
+        # Finished presentations keyed by prompt, and crew outputs keyed by their
+        # prompts, shared across processes and restarts via disk
+        self.cache = diskcache.Cache(Config.RESULT_CACHE_DIR)
+        # Recent presentations keyed by prompt meaning, for reworded repeats.
+        # Its embedding model is an optional dependency (requirements-semantic.txt)
+        self.semantic_cache = None
+        if Config.USE_SEMANTIC_CACHE:
+            if importlib.util.find_spec('sentence_transformers') is None:
+                logger.warning("USE_SEMANTIC_CACHE is set but sentence-transformers is not installed, "
+                               "so the semantic cache is off; see requirements-semantic.txt")
+            else:
+                self.semantic_cache = SemanticCache(
+                    store=diskcache.Cache(os.path.join(Config.RESULT_CACHE_DIR, 'semantic'))
+                )
+        # Admission control for crew runs, per model since each model has its
+        # own provider quota: cap in-flight runs, pace starts, and hold new runs
+        # back after the provider reports overload. Semaphores and limiters
+        # belong to the event loop that first waits on them, so each loop gets
+        # its own, dropped along with the loop
+        self._model_limits = weakref.WeakKeyDictionary()
+        # Recent crew outputs keyed by model and prompts, for identical sub-steps
+        self._crew_cache = OrderedDict()
+        # Crews being run right now, so identical concurrent crews share one run
+        self._inflight_crews = {}
+        # Durations of recent uncached primary generations per pipeline and deck
+        # size, to tell when one is straggling
+        self._generation_times = defaultdict(lambda: deque(maxlen=Config.HEDGE_WINDOW))
 
-    @retry_with_backoff
-    def create_presentation(self, topic, style_preferences=None):
+    @staticmethod
+    def _deck_shape(style_preferences):
         """
-        Create a research-driven presentation using multiple AI agents.
+        Return the clamped slide count and whether the separate agents are used.
         """
-        logger.info(f"🚀 PPTCrew starting presentation creation for topic: '{topic}'")
-        
-        # Initialize agents
-        researcher = self.agents.content_researcher_agent()
-        planner = self.agents.planner_agent()
-        content_creator = self.agents.content_creator_agent()
-        designer = self.agents.designer_agent()
-        generator = self.agents.presentation_generator_agent()
-
-        # Ensure num_slides is an integer
         num_slides = style_preferences.get('num_slides', 5)
         num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
-        logger.info(f"📊 Creating {num_slides} slides about: '{topic}'")
+        num_slides = min(max(num_slides, 1), Config.MAX_SLIDES)
+        # Short decks are planned, written and designed in one call; the separate
+        # agents are kept for large decks and for requests that ask for high quality
+        use_multi_agent = (Config.USE_MULTI_AGENT or style_preferences.get('quality') == 'high'
+                           or num_slides > Config.SINGLE_PASS_MAX_SLIDES)
+        return num_slides, use_multi_agent
+
+    @staticmethod
+    def _timing_key(num_slides, use_multi_agent):
+        """
+        Build the generation time window key; decks of similar size on the
+        same pipeline take similar time.
+        """
+        return use_multi_agent, (num_slides - 1) // Config.HEDGE_SLIDE_BUCKET
+
+    @staticmethod
+    def _cache_key(pipeline, topic, num_slides):
+        """
+        Build the result cache key from the normalized topic, slide count and pipeline.
+        """
+        raw_key = f"{pipeline}|{num_slides}|{topic.strip().lower()}"
+        return hashlib.blake2b(raw_key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _crew_key(crew):
+        """
+        Build the crew cache key from each task's model, temperature, prompt,
+        agent persona, output schemas and the outputs it reads from earlier
+        crews, plus the generation settings and CREW_CACHE_VERSION, so changing
+        any of them misses the cache.
+        """
+        digest = hashlib.blake2b(orjson.dumps(DEFAULT_GENERATION_CONFIG, option=orjson.OPT_SORT_KEYS),
+                                 digest_size=16)
+        digest.update(str(CREW_CACHE_VERSION).encode('utf-8'))
+        for task in crew.tasks:
+            llm = task.agent.llm
+            digest.update(getattr(llm, 'model', str(llm)).encode('utf-8'))
+            digest.update(str(getattr(llm, 'temperature', None)).encode('utf-8'))
+            for text in (task.agent.role, task.agent.goal, task.agent.backstory,
+                         task.description, task.expected_output):
+                digest.update(str(text).encode('utf-8'))
+            for schema in (getattr(llm, 'response_format', None), task.output_pydantic):
+                digest.update(_schema_fingerprint(schema))
+            # Prompts leave upstream results to the context, so those results are part of the key
+            context = task.context if isinstance(task.context, list) else []
+            for context_task in context:
+                if context_task not in crew.tasks:
+                    digest.update(str(getattr(context_task.output, 'raw', '')).encode('utf-8'))
+        return f"crew:{digest.hexdigest()}"
+
+    async def _execute_crew(self, crew):
+        """
+        Run a crew without blocking the event loop while the LLM calls are in flight.
+        Identical crews reuse the earlier output instead of calling the LLM again,
+        from memory or, across restarts, from the on-disk result cache, and an
+        identical crew that is still running is waited for rather than repeated.
+        """
+        crew_key = self._crew_key(crew)
+        cached = self._crew_cache.get(crew_key)
+        if cached is not None:
+            self._crew_cache.move_to_end(crew_key)
+        while cached is None:
+            inflight = self._inflight_crews.get(crew_key)
+            # Futures belong to one event loop; sync and async callers may run on different ones
+            if inflight is None or inflight.get_loop() is not asyncio.get_running_loop():
+                break
+            logger.info("⚡ Waiting for an identical crew that is already running")
+            try:
+                cached = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only this run's own cancellation ends it; when the run it
+                # joined was cancelled instead, join the next one or run the crew here
+                if not inflight.cancelled():
+                    raise
+                logger.info("⚡ The identical crew was cancelled, taking it over")
+
+        if cached is None:
+            # Registered before the disk lookup, so identical crews that arrive
+            # meanwhile wait for this one
+            inflight = asyncio.get_running_loop().create_future()
+            self._inflight_crews[crew_key] = inflight
+            try:
+                # diskcache reads SQLite files and unpickles, so keep it off the event loop
+                cached = await asyncio.to_thread(self.cache.get, crew_key)
+                result = cached if cached is not None else await self._kickoff_crew(crew)
+            except asyncio.CancelledError:
+                inflight.cancel()
+                raise
+            except Exception as e:
+                inflight.set_exception(e)
+                # Mark the error as retrieved; only waiting crews, if any, need it
+                inflight.exception()
+                raise
+            else:
+                inflight.set_result(result)
+            finally:
+                if self._inflight_crews.get(crew_key) is inflight:
+                    del self._inflight_crews[crew_key]
+
+            self._remember_crew(crew_key, result)
+            if cached is None:
+                _count_tokens(result)
+                await asyncio.to_thread(self.cache.set, crew_key, result, expire=Config.RESULT_CACHE_TTL)
+                return result
+
+        logger.info("⚡ Reusing output of an identical crew run")
+        # Later tasks read these tasks' outputs through their context, and
+        # callers that follow progress through task callbacks still hear of each
+        for task, task_output in zip(crew.tasks, cached.tasks_output):
+            task.output = task_output
+            if task.callback:
+                task.callback(task_output)
+        _count_tokens(cached)
+        return cached
+
+    def _limits_for(self, model):
+        """
+        Return the admission limits of a model on the running event loop,
+        creating them on first use.
+        """
+        loop_limits = self._model_limits.setdefault(asyncio.get_running_loop(), {})
+        limits = loop_limits.get(model)
+        if limits is None:
+            limits = loop_limits[model] = ModelLimits(
+                slots=asyncio.Semaphore(Config.MAX_CONCURRENT_LLM),
+                # Token bucket refilling at the per-minute rate that holds at most
+                # LLM_BURST starts, so a quiet period can't release a minute's quota at once
+                rate=AsyncLimiter(Config.LLM_BURST, Config.LLM_BURST * 60 / Config.LLM_REQUESTS_PER_MINUTE)
+            )
+        return limits
+
+    async def _kickoff_crew(self, crew):
+        """
+        Run a crew once the cooldown of each model it calls is over and a
+        concurrency slot and rate limit token of each are free. Crews on
+        different models don't wait for each other. The crew runs in a worker
+        thread that cancelling can't stop, so a cancelled crew keeps its slots
+        until the thread is done calling the LLM.
+        """
+        # Sorted so crews that share models always acquire them in the same order
+        models = sorted({getattr(task.agent.llm, 'model', str(task.agent.llm)) for task in crew.tasks})
+        limits = [self._limits_for(model) for model in models]
+
+        cooldown = max(model_limits.cooldown_until for model_limits in limits) - time.monotonic()
+        if cooldown > 0:
+            logger.info("⏳ Provider recently overloaded, waiting %.1f seconds before next call", cooldown)
+            await asyncio.sleep(cooldown)
+
+        async with contextlib.AsyncExitStack() as admitted:
+            for model_limits in limits:
+                await admitted.enter_async_context(model_limits.slots)
+                await admitted.enter_async_context(model_limits.rate)
+            run = _run_in(_crew_executor, crew.kickoff)
+            try:
+                return await asyncio.shield(run)
+            except asyncio.CancelledError:
+                run.add_done_callback(_releaser(admitted.pop_all()))
+                raise
+            except Exception as e:
+                if is_retryable_error(e):
+                    for model_limits in limits:
+                        model_limits.cooldown_until = max(model_limits.cooldown_until,
+                                                          time.monotonic() + Config.LLM_COOLDOWN)
+                raise
+
+    def _remember_crew(self, crew_key, result):
+        """
+        Keep a crew output in the in-memory LRU.
+        """
+        self._crew_cache[crew_key] = result
+        while len(self._crew_cache) > Config.CREW_CACHE_SIZE:
+            self._crew_cache.popitem(last=False)
+
+    @staticmethod
+    def _notify(on_phase, phase, result):
+        """
+        Report a finished phase to the caller, if it asked for updates.
+        """
+        if on_phase:
+            on_phase(phase, result)
+
+    def create_presentation(self, topic, style_preferences=None, on_phase=None):
+        """
+        Create a research-driven presentation using multiple AI agents.
+        Synchronous entry point for callers that are not running an event loop;
+        the work runs on the shared background loop so concurrent callers share
+        its admission limits.
+        """
+        return self.submit_presentation(topic, style_preferences, on_phase).result()
+
+    def submit_presentation(self, topic, style_preferences=None, on_phase=None):
+        """
+        Start a presentation on the shared background loop without waiting for
+        it, and return a concurrent.futures.Future for its result. Submitted
+        presentations run concurrently as coroutines on that loop; only their
+        crew runs take a worker thread, from a pool sized to the admission limits.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.acreate_presentation(topic, style_preferences, on_phase),
+            _get_event_loop()
+        )
+
+    async def _run_single_pass(self, agents, topic, num_slides, on_phase):
+        """
+        Research, then plan, write and design every slide in a single LLM call,
+        as one crew, then build the slides from the design. The design task
+        reads the research from its context, and each task reports its phase
+        as soon as it finishes.
+        """
+        loop = asyncio.get_running_loop()
+
+        def report(phase):
+            # Task callbacks run on CrewAI's worker thread
+            return lambda output: loop.call_soon_threadsafe(self._notify, on_phase, phase, output)
+
+        researcher = agents.content_researcher_agent()
+        architect = agents.unified_agent()
 
-        # Research Phase: Gather and analyze web content
-        logger.info(f"🔍 PHASE 1: Starting research for topic: '{topic}'")
         research_task = self.tasks.research_task(
             researcher, topic, num_slides
         )
+        research_task.callback = report('research')
+
+        unified_task = self.tasks.unified_task(
+            architect, num_slides
+        )
+        unified_task.context = [research_task]
+        unified_task.callback = report('design')
 
         crew = Crew(
-            agents=[researcher],
-            tasks=[research_task],
+            agents=[researcher, architect],
+            tasks=[research_task, unified_task],
             process=Process.sequential,
-            verbose=True
+            verbose=Config.CREWAI_VERBOSE
         )
 
-        logger.info(f"🔍 Executing research phase for: '{topic}'")
-        research_result = crew.kickoff()
-        logger.info(f"✅ Research phase completed for: '{topic}'")
+        logger.info("🚀 Executing research and single-pass planning for: '%s'", topic)
+        design_result = await self._execute_crew(crew)
+        return await self._generate_slides(agents, topic, [unified_task], design_result)
+
+    async def _generate_slides(self, agents, topic, design_tasks, design_result,
+                               content_tasks=(), content_result=None):
+        """
+        Build the slides' HTML from the design. With Config.RENDER_SLIDES_LOCALLY
+        they are rendered from a template, and the generator agent only writes
+        them when the design can't be rendered. The generator writes each slide
+        of a parseable design in a separate call, all in parallel. It writes
+        only the slide markup, which is then wrapped in the shared slide page.
+        """
+        if Config.RENDER_SLIDES_LOCALLY:
+            # Parsing and rendering a large deck is CPU-bound, so keep it off the event loop
+            slides_html = await _run_in(_cpu_executor, _render_result, design_result, content_result)
+            if slides_html is not None:
+                return slides_html
+            logger.warning("⚠️ Could not render the design, generating the slides instead for: '%s'", topic)
+
+        generator = agents.presentation_generator_agent()
+        design = _result_data(design_result)
+        slides = _result_slides(design)
+        if slides and len(slides) > 1:
+            return await self._generate_each_slide(generator, topic, design, slides, content_result)
+
+        # A design made from the plan carries planned text, so pass the real content too
+        generation_task = self.tasks.presentation_generation_task(
+            generator, FROM_CONTEXT, FROM_CONTEXT if content_tasks else None
+        )
+        generation_task.context = [*design_tasks, *content_tasks]
+
+        crew = Crew(
+            agents=[generator],
+            tasks=[generation_task],
+            process=Process.sequential,
+            verbose=Config.CREWAI_VERBOSE
+        )
+
+        logger.info("🏗️ Executing final generation for: '%s'", topic)
+        result = await self._execute_crew(crew)
+        return await _run_in(_cpu_executor, wrap_slides, getattr(result, 'raw', str(result)), design)
+
+    async def _generate_each_slide(self, generator, topic, design, slides, content_result=None):
+        """
+        Have the generator write every slide of the design in its own crew, all
+        in parallel, and return their HTML joined in slide order.
+        """
+        written = {slide.get('slide_number'): slide for slide in (_result_slides(content_result) or [])}
+        slides_html = [None] * len(slides)
+
+        async def generate_slide(index, slide):
+            content = written.get(slide.get('slide_number'))
+            generation_task = self.tasks.presentation_generation_task(
+                generator, {**design, 'slides': [slide]},
+                {'slides': [content]} if content is not None else None
+            )
+            result = await self._execute_crew(Crew(
+                agents=[generator],
+                tasks=[generation_task],
+                process=Process.sequential,
+                verbose=Config.CREWAI_VERBOSE
+            ))
+            slides_html[index] = wrap_slides(getattr(result, 'raw', str(result)), design, index + 1)
+
+        logger.info("🏗️ Executing final generation of %s slides in parallel for: '%s'", len(slides), topic)
+        await asyncio.gather(*[generate_slide(index, slide) for index, slide in enumerate(slides)])
+        return "\n\n".join(slides_html)
+
+    async def _run_chunked(self, phase, topic, agent, make_task, source, source_tasks, research_task,
+                           on_chunk=None):
+        """
+        Run the task make_task(source, research) builds, reading source, the
+        output of source_tasks, from its context. When source has more than
+        Config.CONTENT_CHUNK_SIZE slides, run one task per chunk of its slides
+        in parallel instead and merge the results in slide order, passing
+        each chunk's result to on_chunk as soon as it finishes. Chunks carry
+        the research in their prompt, ahead of their own slides, so their
+        shared prefix is cached by the provider.
+        Returns (tasks, result).
+        """
+        data = _result_data(source)
+        slides = data.get('slides') if data is not None else None
+        chunk_size = Config.CONTENT_CHUNK_SIZE
+
+        if isinstance(slides, list) and len(slides) > chunk_size:
+            chunk_tasks = []
+            research = research_task.output.raw if research_task.output is not None else FROM_CONTEXT
+            for i in range(0, len(slides), chunk_size):
+                # Each chunk only sees its own slides, so the full source stays out of its context
+                chunk_task = make_task({**data, 'slides': slides[i:i + chunk_size]}, research)
+                chunk_task.context = [research_task] if research is FROM_CONTEXT else []
+                chunk_tasks.append(chunk_task)
+
+            logger.info("⚡ Running %s for %s slides in %s parallel chunks for: '%s'",
+                        phase, len(slides), len(chunk_tasks), topic)
+            async def run_chunk(chunk_task):
+                result = await self._execute_crew(Crew(
+                    agents=[agent],
+                    tasks=[chunk_task],
+                    process=Process.sequential,
+                    verbose=Config.CREWAI_VERBOSE
+                ))
+                if on_chunk:
+                    on_chunk(result)
+                return result
+
+            chunk_results = await asyncio.gather(*[run_chunk(chunk_task) for chunk_task in chunk_tasks])
+
+            chunks = [_result_data(result) for result in chunk_results]
+            if all(chunk is not None and isinstance(chunk.get('slides'), list) for chunk in chunks):
+                merged = {**chunks[0], 'slides': [slide for chunk in chunks for slide in chunk['slides']]}
+                return chunk_tasks, merged
+            logger.warning("⚠️ Could not merge chunked %s, running it for all slides at once for: '%s'",
+                           phase, topic)
+
+        # The source is the output of source_tasks, so read it from the context
+        task = make_task(FROM_CONTEXT)
+        task.context = [*source_tasks, research_task]
+
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=Config.CREWAI_VERBOSE
+        )
+        return [task], await self._execute_crew(crew)
+
+    async def _plan_content_and_design(self, agents, topic, num_slides, research_task, on_phase):
+        """
+        Run the separate planner, content creator and designer agents.
+        Returns (design_tasks, design_result, content), where content is
+        (content_tasks, content_result) when the design was made from the plan
+        and the generator also needs the final content, otherwise None.
+        """
+        planner = agents.planner_agent()
+        content_creator = agents.content_creator_agent()
+        designer = agents.designer_agent()
 
         # Planning Phase: Create structure based on research
-        logger.info(f"📋 PHASE 2: Starting planning based on research about: '{topic}'")
+        logger.info("📋 PHASE 2: Starting planning based on research about: '%s'", topic)
         planning_task = self.tasks.planning_task(
-            planner, research_result, num_slides
+            planner, num_slides
         )
         planning_task.context = [research_task]
 
@@ -917,72 +1574,291 @@ class PPTCrew:
             agents=[planner],
             tasks=[planning_task],
             process=Process.sequential,
-            verbose=True
+            verbose=Config.CREWAI_VERBOSE
         )
 
-        logger.info(f"📋 Executing planning phase for: '{topic}'")
-        planning_result = crew.kickoff()
-        logger.info(f"✅ Planning phase completed for: '{topic}'")
+        logger.info("📋 Executing planning phase for: '%s'", topic)
+        planning_result = await self._execute_crew(crew)
+        logger.info("✅ Planning phase completed for: '%s'", topic)
+        self._notify(on_phase, 'planning', planning_result)
+        # Parse the plan once; the content, design and structure checks all reuse it
+        plan = _result_data(planning_result)
+        if plan is not None:
+            planning_result = plan
+
+        # Content and design are written slide by slide, so large decks fan out
+        # into parallel calls on the plan's slide chunks
+        def make_content_task(source, research=FROM_CONTEXT):
+            return self.tasks.content_creation_task(content_creator, source, research)
+
+        def make_design_task(source, research=FROM_CONTEXT):
+            return self.tasks.design_task(designer, source, research)
 
         # Content Creation Phase
-        logger.info(f"✍️ PHASE 3: Creating content for: '{topic}'")
-        content_task = self.tasks.content_creation_task(
-            content_creator, planning_result, research_result
+        logger.info("✍️ PHASE 3: Creating content for: '%s'", topic)
+        write_content = self._run_chunked(
+            'content creation', topic, content_creator, make_content_task,
+            planning_result, [planning_task], research_task,
+            on_chunk=lambda result: self._notify(on_phase, 'content_chunk', result)
         )
-        content_task.context = [planning_task, research_task]
 
-        crew = Crew(
-            agents=[content_creator],
-            tasks=[content_task],
-            process=Process.sequential,
-            verbose=True
-        )
+        # Design Phase: the design mostly depends on the slide structure, which the
+        # plan already fixes, so design against the plan while content is written
+        speculative_design = Config.SPECULATIVE_DESIGN
+        if speculative_design:
+            logger.info("🎨 PHASE 4: Designing presentation from the plan for: '%s'", topic)
+            design_from_plan = self._run_chunked(
+                'design', topic, designer, make_design_task,
+                planning_result, [planning_task], research_task
+            )
 
-        logger.info(f"✍️ Executing content creation for: '{topic}'")
-        content_result = crew.kickoff()
-        logger.info(f"✅ Content creation completed for: '{topic}'")
+            logger.info("✍️🎨 Executing content creation and design in parallel for: '%s'", topic)
+            (content_tasks, content_result), (design_tasks, design_result) = await asyncio.gather(
+                write_content,
+                design_from_plan
+            )
+            logger.info("✅ Content creation completed for: '%s'", topic)
+            self._notify(on_phase, 'content', content_result)
 
-        # Design Phase
-        logger.info(f"🎨 PHASE 4: Designing presentation for: '{topic}'")
-        design_task = self.tasks.design_task(
-            designer, content_result, research_result
-        )
-        design_task.context = [content_task, research_task]
+            # Keep the speculative design only if the content kept the planned structure
+            plan_structure = _slide_structure(planning_result)
+            if plan_structure is None or plan_structure != _slide_structure(content_result):
+                logger.info("🎨 Content structure differs from the plan, redesigning for: '%s'", topic)
+                speculative_design = False
+            else:
+                logger.info("✅ Design phase completed for: '%s'", topic)
+        else:
+            logger.info("✍️ Executing content creation for: '%s'", topic)
+            content_tasks, content_result = await write_content
+            logger.info("✅ Content creation completed for: '%s'", topic)
+            self._notify(on_phase, 'content', content_result)
 
-        crew = Crew(
-            agents=[designer],
-            tasks=[design_task],
-            process=Process.sequential,
-            verbose=True
+        if not speculative_design:
+            logger.info("🎨 PHASE 4: Designing presentation for: '%s'", topic)
+            logger.info("🎨 Executing design phase for: '%s'", topic)
+            design_tasks, design_result = await self._run_chunked(
+                'design', topic, designer, make_design_task,
+                content_result, content_tasks, research_task
+            )
+            logger.info("✅ Design phase completed for: '%s'", topic)
+
+        self._notify(on_phase, 'design', design_result)
+        if speculative_design:
+            return design_tasks, design_result, (content_tasks, content_result)
+        return design_tasks, design_result, None
+
+    async def acreate_presentation(self, topic, style_preferences=None, on_phase=None):
+        """
+        Create a research-driven presentation using multiple AI agents.
+        Several presentations can be awaited concurrently on one event loop.
+        on_phase(phase, result) is called as each phase finishes, and with
+        'content_chunk' as each chunk of a large deck's content is written.
+        Falls back to the fallback model once the primary model stays overloaded.
+        Raises ProviderUnavailableError if the provider stays overloaded or the
+        whole generation, fallback included, exceeds Config.GENERATION_DEADLINE.
+        """
+        # Tag every log line of this generation, including those from worker threads
+        REQUEST_ID.set((style_preferences or {}).get('project_id', '-'))
+
+        # Reject prompts that could never make a deck before paying for any LLM call
+        topic = topic.strip()
+        if not topic:
+            raise InvalidPromptError("Prompt must not be empty")
+        if len(topic) > Config.MAX_PROMPT_CHARS:
+            raise InvalidPromptError(
+                f"Prompt must be at most {Config.MAX_PROMPT_CHARS} characters, got {len(topic)}"
+            )
+
+        # One time budget shared by the primary attempt, the fallback and all their retries
+        _generation_deadline.set(time.monotonic() + Config.GENERATION_DEADLINE)
+        try:
+            return await asyncio.wait_for(
+                self._generate_with_fallback(topic, style_preferences, on_phase),
+                timeout=Config.GENERATION_DEADLINE
+            )
+        except asyncio.TimeoutError as e:
+            raise ProviderUnavailableError(
+                f"Presentation generation did not finish within {Config.GENERATION_DEADLINE} seconds"
+            ) from e
+        except Exception as e:
+            if is_retryable_error(e):
+                raise ProviderUnavailableError(f"AI provider is overloaded, please try again later: {e}") from e
+            raise
+
+    async def _generate_with_fallback(self, topic, style_preferences, on_phase):
+        """
+        Run the pipeline on the primary agents, then on the fallback agents if
+        the primary model stays overloaded. A primary run that is slower than
+        almost all recent ones is hedged by starting the fallback alongside it,
+        and whichever finishes first is kept.
+        """
+        primary = asyncio.ensure_future(
+            self._generate_with_agents(self.agents, topic, style_preferences, on_phase)
         )
+        hedge = None
+        try:
+            hedge_delay = self._hedge_delay(self._timing_key(*self._deck_shape(style_preferences)))
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+                if not done:
+                    logger.info("⏱️ No result from %s after %.1f seconds, also trying %s for: '%s'",
+                                self.agents.model, hedge_delay, self.fallback_agents.model, topic)
+                    hedge = asyncio.ensure_future(self._run_hedge(topic, style_preferences, on_phase))
+                    return await self._first_success(primary, hedge)
+            try:
+                return await primary
+            except Exception as e:
+                if self.fallback_agents.model == self.agents.model or not is_retryable_error(e):
+                    raise
+                logger.warning("⚠️ Model %s unavailable, switching to fallback model %s for: '%s'",
+                               self.agents.model, self.fallback_agents.model, topic)
+                return await self._generate_with_agents(self.fallback_agents, topic, style_preferences, on_phase)
+        finally:
+            # Cancel the losing run, or both when the caller gave up, so it starts
+            # no more crews. A crew already calling the LLM can't be interrupted;
+            # it finishes in its worker thread and keeps its admission slot until then
+            for run in (primary, hedge):
+                if run is not None and not run.done():
+                    run.cancel()
 
-        logger.info(f"🎨 Executing design phase for: '{topic}'")
-        design_result = crew.kickoff()
-        logger.info(f"✅ Design phase completed for: '{topic}'")
+    def _hedge_delay(self, timing_key):
+        """
+        Return how long to wait for the primary model before hedging with the
+        fallback model: Config.HEDGE_PERCENTILE of recent generation times of
+        the same pipeline and deck size. Returns None when hedging is off, the
+        fallback is the primary model, or too few generations were timed yet.
+        """
+        if not Config.HEDGE_REQUESTS or Config.FALLBACK_MODEL == Config.CREWAI_MODEL:
+            return None
+        if self.fallback_agents.model == self.agents.model:
+            return None
+        window = self._generation_times.get(timing_key, ())
+        if len(window) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        times = sorted(window)
+        return times[min(len(times) - 1, int(len(times) * Config.HEDGE_PERCENTILE))]
 
-        # Generation Phase
-        logger.info(f"🏗️ PHASE 5: Generating final presentation for: '{topic}'")
-        generation_task = self.tasks.presentation_generation_task(
-            generator, design_result
+    async def _run_hedge(self, topic, style_preferences, on_phase):
+        """
+        Run the pipeline on the fallback agents as a hedge. Its phases would
+        repeat the primary run's, so only its final result is reported.
+        """
+        result = await self._generate_with_agents(self.fallback_agents, topic, style_preferences, None)
+        self._notify(on_phase, 'generation', result)
+        return result
+
+    @staticmethod
+    async def _first_success(*runs):
+        """
+        Return the result of whichever run succeeds first, or raise the first
+        run's error if all of them fail.
+        """
+        pending = set(runs)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for run in done:
+                if run.exception() is None:
+                    return run.result()
+        return runs[0].result()
+
+    @retry_with_backoff
+    async def _generate_with_agents(self, agents, topic, style_preferences, on_phase):
+        """
+        Run the full pipeline with the given agent set.
+        """
+        logger.info("🚀 PPTCrew starting presentation creation for topic: '%s'", topic)
+
+        num_slides, use_multi_agent = self._deck_shape(style_preferences)
+        # Cached presentations are reused only from the same prompt and template
+        # versions and the same way of rendering slides
+        pipeline = (f"{agents.model}|{'multi' if use_multi_agent else 'single'}|"
+                    f"{'local' if Config.RENDER_SLIDES_LOCALLY else 'agent'}|"
+                    f"{CREW_CACHE_VERSION}|{TEMPLATE_VERSION}")
+
+        # Identical requests skip all five agent phases
+        cache_key = self._cache_key(pipeline, topic, num_slides)
+        cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            logger.info("⚡ Cache hit for topic: '%s' (%s slides), ~%s tokens saved",
+                        topic, num_slides, cached['total_tokens'])
+            self._notify(on_phase, 'generation', cached['result'])
+            return cached['result']
+
+        # Reworded requests for the same deck reuse the closest earlier result
+        prompt_vector = None
+        if self.semantic_cache is not None:
+            prompt_vector = await _run_in(_cpu_executor, self.semantic_cache.embed, topic)
+            similar = self.semantic_cache.get(prompt_vector, pipeline, num_slides)
+            if similar is not None:
+                logger.info("⚡ Semantic cache hit for topic: '%s' (%s slides)", topic, num_slides)
+                self._notify(on_phase, 'generation', similar)
+                return similar
+
+        logger.info("📊 Creating %s slides about: '%s'", num_slides, topic)
+        started = time.monotonic()
+        token_counts = []
+        _generation_tokens.set(token_counts)
+        if use_multi_agent:
+            final_result = await self._run_multi_agent(agents, topic, num_slides, on_phase)
+        else:
+            final_result = await self._run_single_pass(agents, topic, num_slides, on_phase)
+        if agents is self.agents:
+            self._generation_times[self._timing_key(num_slides, use_multi_agent)].append(
+                time.monotonic() - started
+            )
+        logger.info("🎉 Presentation generation COMPLETED for: '%s'", topic)
+        self._notify(on_phase, 'generation', final_result)
+
+        raw_result = getattr(final_result, 'raw', str(final_result))
+        await asyncio.to_thread(self.cache.set, cache_key, {
+            'result': raw_result,
+            'total_tokens': sum(token_counts)
+        }, expire=Config.RESULT_CACHE_TTL)
+        if prompt_vector is not None:
+            await asyncio.to_thread(self.semantic_cache.add, cache_key, prompt_vector, pipeline, num_slides, raw_result)
+        # Desktop notification; not waited for so the event loop keeps
+        # serving the other presentations
+        _in_background(_notify_desktop("--icon=dialog-information", "PPT Generator"))
+
+        return final_result
+
+    async def _run_multi_agent(self, agents, topic, num_slides, on_phase):
+        """
+        Research, then run the separate planner, content creator and designer
+        agents, then generate, one crew per phase.
+        """
+        researcher = agents.content_researcher_agent()
+
+        # Research Phase: Gather and analyze web content
+        logger.info("🔍 PHASE 1: Starting research for topic: '%s'", topic)
+        research_task = self.tasks.research_task(
+            researcher, topic, num_slides
         )
-        generation_task.context = [design_task]
 
         crew = Crew(
-            agents=[generator],
-            tasks=[generation_task],
+            agents=[researcher],
+            tasks=[research_task],
             process=Process.sequential,
-            verbose=True
+            verbose=Config.CREWAI_VERBOSE
         )
 
-        logger.info(f"🏗️ Executing final generation for: '{topic}'")
-        final_result = crew.kickoff()
-        logger.info(f"🎉 Presentation generation COMPLETED for: '{topic}'")
-        import subprocess
-        subprocess.run([
-            "notify-send",
-            "--icon=dialog-information",
-            "PPT Generator",
-        ])
+        logger.info("🔍 Executing research phase for: '%s'", topic)
+        research_result = await self._execute_crew(crew)
+        logger.info("✅ Research phase completed for: '%s'", topic)
+        self._notify(on_phase, 'research', research_result)
 
-        
-        return final_result
\ No newline at end of file
+        # Planning, content and design all read the research, so pass them a compact copy
+        compact_research = _compact_research(research_result)
+        if compact_research is not None and research_task.output is not None:
+            research_task.output = research_task.output.model_copy(update={'raw': compact_research})
+
+        design_tasks, design_result, content = await self._plan_content_and_design(
+            agents, topic, num_slides, research_task, on_phase
+        )
+
+        # Generation Phase
+        logger.info("🏗️ PHASE 5: Generating final presentation for: '%s'", topic)
+        content_tasks, content_result = content or ((), None)
+        return await self._generate_slides(
+            agents, topic, design_tasks, design_result, content_tasks, content_result
+        )
\ No newline at end of file
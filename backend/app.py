@@ -2,7 +2,7 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning, module='pydantic')
 
 import os
-import json
+import orjson
 from datetime import datetime
 from flask import Flask, request, jsonify, send_file, render_template_string
 from flask_socketio import SocketIO, emit, join_room, leave_room
@@ -34,7 +34,9 @@ app.config['SECRET_KEY'] = Config.SECRET_KEY
 # Enable CORS for all routes
 CORS(app, origins="*")
 
-# Initialize SocketIO with eventlet for better performance and no duplication
+# Threading mode, since generation runs on real threads and a background asyncio
+# loop that green threads would block; simple-websocket gives it real WebSockets
+# instead of long-polling
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', logger=False, engineio_logger=False)
 
 # Initialize project manager as a global singleton
@@ -60,8 +62,8 @@ def download_pdf(presentation_id):
                 json_path = project_manager.get_response_path(presentation_id)
                 if json_path and os.path.exists(json_path):
                     try:
-                        with open(json_path, 'r', encoding='utf-8') as f:
-                            json_data = json.load(f)
+                        with open(json_path, 'rb') as f:
+                            json_data = orjson.loads(f.read())
                             topic = json_data.get('topic') or json_data.get('title', '')
                             if topic:
                                 sanitized_topic = PPTProjectManager.sanitize_filename(topic)
@@ -108,6 +110,7 @@ def create_presentation():
         num_slides = int(num_slides) if isinstance(num_slides, str) else num_slides
         
         theme_name = data.get('theme') or style_preferences.get('theme', 'corporate_blue')
+        quality = data.get('quality') or style_preferences.get('quality', 'standard')
         
         logger.info(f"Processing presentation: title='{title}', num_slides={num_slides}, theme='{theme_name}'")
         
@@ -117,11 +120,23 @@ def create_presentation():
                 user_prompt=title,
                 num_slides=num_slides,
                 theme_name=theme_name,
+                quality=quality,
             )
             
             if result['success']:
                 project_id = result['project_id']
                 output_path = result['file_path']
+            elif result.get('provider_unavailable'):
+                # Tell the client to come back later instead of holding the request
+                return jsonify({
+                    'status': 'error',
+                    'message': result['error']
+                }), 503
+            elif result.get('invalid_prompt'):
+                return jsonify({
+                    'status': 'error',
+                    'message': result['error']
+                }), 400
             else:
                 raise Exception(result.get('error', 'Unknown error occurred'))
             
@@ -204,8 +219,8 @@ def generate_presentation(project_id):
         else:
             return jsonify({
                 'status': 'error',
-                'message': result['user_message']
-            }), 500
+                'message': result['error']
+            }), 400 if result.get('invalid_prompt') else 503 if result.get('provider_unavailable') else 500
             
     except Exception as e:
         logger.error(f"Failed to generate presentation: {e}")
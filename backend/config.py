@@ -9,6 +9,12 @@ class Config:
     CREWAI_MODEL = "gemini/gemini-2.5-flash"
     FALLBACK_MODEL = "gemini/gemini-2.5-flash"  # Fallback model for when primary is overloaded
     
+    # Per-role models for the multi-agent pipeline
+    PLANNER_MODEL = "gemini/gemini-2.5-flash-lite"  # Short JSON blueprint, fast and cheap is enough
+    CONTENT_MODEL = CREWAI_MODEL  # Slide text benefits most from the stronger model
+    DESIGNER_MODEL = "gemini/gemini-2.5-flash-lite"  # Schema filling, fast and cheap is enough
+    STRUCTURED_TEMPERATURE = 0.0  # Planner and designer only fill schemas, so sample them greedily
+    
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     FLASK_ENV = 'production'  # Force production mode to prevent auto-reload
@@ -18,6 +24,7 @@ class Config:
     # PPT Generation Configuration
     MAX_SLIDES = 20  # Maximum number of slides allowed
     DEFAULT_SLIDES = 5  # Default number of slides if not specified
+    MAX_PROMPT_CHARS = 2000  # Longer prompts are rejected before any LLM call
     
     # File paths
     GENERATED_PPTS_DIR = 'generated_ppts'
@@ -29,6 +36,21 @@ class Config:
     
     # Agent Configuration
     AGENT_TIMEOUT = 300  # 5 minutes timeout for each agent
+    CREWAI_VERBOSE = os.getenv('CREWAI_VERBOSE', 'false').lower() == 'true'  # Print every prompt and response to stdout, for development
+    GENERATION_DEADLINE = 600  # Seconds a whole generation may take, fallback and retries included
+    HEDGE_REQUESTS = True  # Also start the fallback model when the primary is slower than usual, and keep the first result
+    HEDGE_PERCENTILE = 0.95  # Generation time percentile after which the fallback is started
+    HEDGE_WINDOW = 100  # Recent generation times the percentile is taken over
+    HEDGE_MIN_SAMPLES = 20  # Generations to observe per pipeline and deck size before hedging
+    HEDGE_SLIDE_BUCKET = 5  # Slide counts timed together, since larger decks take longer
+    USE_MULTI_AGENT = False  # Always use separate planner/content/designer agents instead of one combined call
+    SINGLE_PASS_MAX_SLIDES = 10  # Larger decks use the separate agents, which write slides in parallel chunks
+    SPECULATIVE_DESIGN = True  # Design from the plan while content is being written
+    CONTENT_CHUNK_SIZE = 5  # Slides per parallel content call for larger decks
+    RESEARCH_MAX_THEMES = 10  # Highest importance research themes passed on to later phases
+    RESEARCH_MAX_FACTS = 20  # Research facts passed on to later phases
+    RESEARCH_ITEM_CHARS = 200  # Longest research text item passed on to later phases
+    RENDER_SLIDES_LOCALLY = True  # Render slide HTML from the design with a template instead of the generator agent
     
     # Retry Configuration for API calls
     MAX_RETRIES = 5  # Maximum number of retry attempts (increased from 3)
@@ -36,6 +58,23 @@ class Config:
     RETRY_BACKOFF = 1.5  # Exponential backoff multiplier (reduced for more frequent retries)
     MAX_RETRY_DELAY = 30  # Maximum delay between retries
     
+    # Admission control for LLM crew runs shared by all requests, per model
+    MAX_CONCURRENT_LLM = 4  # Crew runs allowed in flight at once
+    LLM_REQUESTS_PER_MINUTE = 30  # Crew runs started per minute
+    LLM_BURST = 4  # Crew runs that may start back to back before pacing kicks in
+    LLM_COOLDOWN = 10  # Seconds to hold new runs after an overload error
+    CPU_WORKERS = os.cpu_count() or 1  # Threads for rendering and embedding, apart from the crew runs
+    
+    # Result cache for repeated prompts
+    RESULT_CACHE_DIR = os.path.expanduser('~/.ppt_cache')
+    RESULT_CACHE_TTL = 7 * 24 * 60 * 60  # Cached presentations expire after a week
+    SCRAPE_CACHE_TTL = 24 * 60 * 60  # Scraped pages are fetched again after a day
+    USE_SEMANTIC_CACHE = False  # Also reuse results for reworded prompts; needs requirements-semantic.txt
+    SEMANTIC_CACHE_MODEL = 'all-MiniLM-L6-v2'  # sentence-transformers embedding model
+    SEMANTIC_CACHE_THRESHOLD = 0.92  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_SIZE = 1000  # Most recent prompts kept in memory
+    CREW_CACHE_SIZE = 256  # Most recent crew outputs kept in memory
+    
     @staticmethod
     def validate_config():
         """Validate that all required configuration is present"""
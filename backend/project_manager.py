@@ -1,8 +1,8 @@
 import os
-import json
+import orjson
 import re
 from datetime import datetime
-from agents import PPTCrew
+from agents import PPTCrew, ProviderUnavailableError, InvalidPromptError
 from config import Config
 import logging
 from themes import ThemeConfig, PPTThemes
@@ -12,6 +12,10 @@ from flask import render_template_string
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Opening markdown code fence, with any language tag, and closing fence of a
+# stripped LLM response, removed in one pass
+_CODE_FENCE_RE = re.compile(r"^```[A-Za-z]*|```$")
+
 class PPTProjectManager:
 
     @staticmethod
@@ -70,14 +74,7 @@ class PPTProjectManager:
         """
         if not isinstance(content, str):
             return content
-        content = content.strip()
-        if content.startswith('```html'):
-            content = content[len('```html'):]
-        elif content.startswith('```'):
-            content = content[len('```'):]
-        if content.endswith('```'):
-            content = content[:-3]
-        return content.strip()
+        return _CODE_FENCE_RE.sub('', content.strip()).strip()
 
     def __init__(self, socketio=None):
         self.socketio = socketio
@@ -98,8 +95,9 @@ class PPTProjectManager:
         # If JSON doesn't exist, create it from project data
         if project_id in self.projects and not os.path.exists(json_path):
             try:
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.projects[project_id], f, indent=2, default=str)
+                with open(json_path, 'wb') as f:
+                    f.write(orjson.dumps(self.projects[project_id], default=str,
+                                         option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             except Exception as e:
                 logger.warning(f"Could not create JSON file for project {project_id}: {e}")
         return json_path if os.path.exists(json_path) else None
@@ -132,8 +130,8 @@ class PPTProjectManager:
                     # Try to load additional metadata from JSON file
                     if os.path.exists(json_path):
                         try:
-                            with open(json_path, 'r', encoding='utf-8') as f:
-                                json_data = json.load(f)
+                            with open(json_path, 'rb') as f:
+                                json_data = orjson.loads(f.read())
                                 project_info.update({
                                     'topic': json_data.get('topic', json_data.get('title', 'Untitled')),
                                     'title': json_data.get('title', json_data.get('topic', 'Untitled')),
@@ -246,8 +244,8 @@ class PPTProjectManager:
     def _load_project_states(self):
         try:
             if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    self.projects = json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    self.projects = orjson.loads(f.read())
                 logger.info(f"Loaded {len(self.projects)} project states from disk")
         except Exception as e:
             logger.warning(f"Failed to load project states: {e}")
@@ -302,7 +300,7 @@ class PPTProjectManager:
                 f.write(f"Response:\n{response}\n\n")
             logger.info(f"Logged agent response to {file_path}")
 
-    def generate_presentation(self, user_prompt, num_slides=5, project_id=None, theme_name='corporate_blue'):
+    def generate_presentation(self, user_prompt, num_slides=5, project_id=None, theme_name='corporate_blue', quality='standard'):
         if not project_id:
             project_id = self.generate_project_id_from_topic(user_prompt, self.projects)
         
@@ -329,13 +327,17 @@ class PPTProjectManager:
             style_prefs = {
                 'num_slides': num_slides,
                 'project_id': project_id,
-                'theme': theme_name
+                'theme': theme_name,
+                'quality': quality
             }
             
             logger.info(f"🤖 Calling AI agents to research and create presentation about: '{user_prompt}'")
             presentation_plan = self.crew.create_presentation(
                 topic=user_prompt,
-                style_preferences=style_prefs
+                style_preferences=style_prefs,
+                on_phase=lambda phase, result: self.emit_progress(
+                    project_id, phase, f"{phase.replace('_', ' ').capitalize()} phase complete for: {user_prompt}"
+                )
             )
             
             logger.info(f"✅ AI agents completed. Processing results for topic: '{user_prompt}'")
@@ -356,21 +358,6 @@ class PPTProjectManager:
             logger.info(f"Raw result type after extraction: {type(raw_result)}")
             logger.info(f"Raw result content: {str(raw_result)[:500]}")
             
-            def clean_html_code_block(content: str) -> str:
-                """
-                Removes leading ```html and trailing ``` from a string, returning the cleaned HTML content.
-                """
-                if not isinstance(content, str):
-                    return content
-                content = content.strip()
-                if content.startswith('```html'):
-                    content = content[len('```html'):]
-                elif content.startswith('```'):
-                    content = content[len('```'):]
-                if content.endswith('```'):
-                    content = content[:-3]
-                return content.strip()
-
             if isinstance(raw_result, str):
                 # First try to clean HTML code block format
                 if "```html" in raw_result or raw_result.strip().startswith("```"):
@@ -394,28 +381,29 @@ class PPTProjectManager:
                         self.projects[project_id]['html_path'] = html_file_path  # Store the path in project data
                         return self._generate_pdf_from_html(project_id, html_content)
                 
-                # If not HTML, try to find JSON structure
+                # If not HTML, try to find JSON structure; it is parsed only once
+                plan_data = None
                 json_start = raw_result.find('{')
                 json_end = raw_result.rfind('}')
                 if json_start != -1 and json_end != -1:
                     potential_json = raw_result[json_start:json_end + 1]
                     logger.info(f"Found potential JSON: {potential_json[:200]}...")
                     try:
-                        json.loads(potential_json)
-                        raw_result = potential_json
+                        plan_data = orjson.loads(potential_json)
                         logger.info("Successfully extracted JSON structure")
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.warning(f"Found JSON-like structure but failed to parse: {e}")
                 
-                cleaned_result = self._clean_json_content(raw_result)
-                logger.info(f"Cleaned result: {cleaned_result[:500]}")
-                
-                try:
-                    plan_data = json.loads(cleaned_result)
-                except json.JSONDecodeError as json_err:
-                    logger.warning(f"CrewOutput result is not valid JSON: {json_err}")
+                if plan_data is None:
+                    cleaned_result = self._clean_json_content(raw_result)
+                    logger.info(f"Cleaned result: {cleaned_result[:500]}")
                     
-                    plan_data = {}
+                    try:
+                        plan_data = orjson.loads(cleaned_result)
+                    except orjson.JSONDecodeError as json_err:
+                        logger.warning(f"CrewOutput result is not valid JSON: {json_err}")
+                        
+                        plan_data = {}
             elif isinstance(raw_result, dict):
                 plan_data = raw_result
             else:
@@ -424,7 +412,7 @@ class PPTProjectManager:
                 plan_data = {}
             
             self._validate_plan_data(plan_data)
-            # PPTProjectManager._log_agent_response(project_id, "Planner Agent", json.dumps(plan_data, indent=2))
+            # PPTProjectManager._log_agent_response(project_id, "Planner Agent", orjson.dumps(plan_data, option=orjson.OPT_INDENT_2).decode())
             
             self.emit_progress(project_id, 'packaging', 'Creating presentation assets...')
             pdf_path = self._create_html_presentation(plan_data, project_id, theme)
@@ -460,7 +448,11 @@ class PPTProjectManager:
             if self.socketio:
                 self.socketio.emit('project_failed', {'project_id': project_id, 'error': error_str}, room=project_id)
             
-            return {'success': False, 'project_id': project_id, 'error': error_str}
+            return {
+                'success': False, 'project_id': project_id, 'error': error_str,
+                'provider_unavailable': isinstance(e, ProviderUnavailableError),
+                'invalid_prompt': isinstance(e, InvalidPromptError)
+            }
 
     def _extract_crew_result(self, crew_output):
         logger.info(f"CrewOutput type: {type(crew_output)}")
@@ -486,23 +478,8 @@ class PPTProjectManager:
         if not isinstance(content, str):
             return content
             
-        content = content.strip()
-        
-        # Handle various markdown code block formats
-        code_block_starts = ['```json', '```html', '```javascript', '```js', '```']
-        for start in code_block_starts:
-            if content.startswith(start):
-                content = content[len(start):]
-                break
-                
-        # Remove ending code block markers
-        if content.endswith('```'):
-            content = content[:-3]
-            
-        # Clean the content and try to find JSON content
-        content = content.strip()
-        
-        return content
+        # Handle markdown code blocks of any language
+        return _CODE_FENCE_RE.sub('', content.strip()).strip()
 
     def _validate_plan_data(self, plan_data):
         if not isinstance(plan_data, dict):
@@ -0,0 +1,17 @@
+import contextvars
+import logging
+
+# Project ID of the presentation being generated, for tagging log records.
+# Set at the start of a generation; asyncio tasks and worker threads started
+# from it inherit the value.
+REQUEST_ID = contextvars.ContextVar('request_id', default='-')
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Add the current request ID to every record as %(request_id)s.
+    """
+
+    def filter(self, record):
+        record.request_id = REQUEST_ID.get()
+        return True
@@ -0,0 +1,81 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+# Structured outputs for the agents. Passed to the LLM as its response schema
+# so the model can only emit valid JSON of this shape.
+
+ContentType = Literal["title_only", "bullet_points", "paragraph", "two_column"]
+
+
+class SlideBlueprint(BaseModel):
+    slide_number: int
+    title: str = Field(description="Title based on research theme (≤ 10 words)")
+    subtitle: str = Field(description="Subtitle related to the topic")
+    content_type: ContentType
+    description: str = Field(description="What this slide covers about the topic")
+    research_theme: str = Field(description="Which research theme this slide covers")
+    key_points: List[str] = Field(description="Points from research data")
+    sources: List[str] = Field(description="Sources from research")
+
+
+class PresentationBlueprint(BaseModel):
+    presentation_title: str = Field(description="Title based on researched topic")
+    presentation_description: str = Field(description="Description of the specific topic")
+    target_topic: str = Field(description="The exact topic researched")
+    total_slides: int
+    slides: List[SlideBlueprint]
+
+
+class SlideContent(BaseModel):
+    slide_number: int
+    title: str = Field(description="Slide title from planning (≤ 10 words)")
+    subtitle: str = Field(description="Subtitle if needed (≤ 8 words)")
+    content_type: ContentType = Field(description="From planning structure")
+    main_content: str = Field(description="Content based on research data (follow length constraints by type)")
+    sources: List[str] = Field(description="Sources from research data")
+    research_basis: str = Field(description="Which research theme this content is based on")
+
+
+class PresentationContent(BaseModel):
+    presentation_title: str = Field(description="Title from planning (≤ 10 words)")
+    topic_focus: str = Field(description="The specific topic researched")
+    slides: List[SlideContent]
+
+
+class ColorScheme(BaseModel):
+    primary: str = Field(description="#hex")
+    accent: str = Field(description="#hex")
+    background: str = Field(description="#hex")
+
+
+class Typography(BaseModel):
+    title_font: str = Field(description="Font name")
+    body_font: str = Field(description="Font name")
+
+
+class VisualElements(BaseModel):
+    type: Literal["chart", "image", "icon", "diagram"]
+    purpose: Literal["data", "concept", "process"]
+
+
+class DesignedSlide(BaseModel):
+    slide_number: int
+    title: str = Field(description="Slide title (≤ 10 words)")
+    subtitle: str = Field(description="Subtitle if needed (≤ 8 words)")
+    content_type: ContentType
+    main_content: str = Field(description="Content based on research data (follow length constraints by type)")
+    sources: List[str] = Field(description="Sources from research data")
+    layout_type: str = Field(description="Layout based on content and research")
+    visual_elements: VisualElements
+    data_visualization: str = Field(description="Chart type and format, if any")
+
+
+class PresentationDesign(BaseModel):
+    presentation_title: str = Field(description="Title based on researched topic (≤ 10 words)")
+    presentation_description: str = Field(description="Description of the specific topic")
+    topic_focus: str = Field(description="The specific topic researched")
+    total_slides: int
+    color_scheme: ColorScheme
+    typography: Typography
+    slides: List[DesignedSlide]
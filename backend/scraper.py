@@ -1,12 +1,30 @@
 import os
+import asyncio
+import functools
+import diskcache
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-import time
+from config import Config
 import sys
 
+# selectolax parses in C, many times faster than BeautifulSoup's Python tree;
+# BeautifulSoup stays as the fallback where it isn't installed
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+    from bs4 import BeautifulSoup
+
 load_dotenv()
 
+# One pooled session for all blocking requests, so repeated searches and
+# scrapes reuse kept-alive connections instead of a new TLS handshake each
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
 def google_search(query, num=4):
     """
     Perform a Google Custom Search query using API key and CSE ID from env vars.
@@ -28,7 +46,7 @@ def google_search(query, num=4):
         "cx": cse_id,
         "num": num,
     }
-    response = requests.get(url, params=params)
+    response = _session.get(url, params=params)
     results = []
     if response.status_code == 200:
         data = response.json()
@@ -42,6 +60,32 @@ def google_search(query, num=4):
         print("Error:", response.status_code, response.text)
     return results
 
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Only the start of a page is kept, so larger pages are not downloaded in full
+MAX_PAGE_BYTES = 200_000
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+@functools.lru_cache(maxsize=None)
+def _page_cache():
+    """
+    Return the on-disk cache of scraped pages, shared across processes and
+    restarts, opening it on first use.
+    """
+    return diskcache.Cache(os.path.join(Config.RESULT_CACHE_DIR, 'pages'))
+
+def _unsupported_content(url, headers):
+    """
+    Return the error result for a response that isn't an HTML page, or None
+    if it is one. Responses without a content type are assumed to be HTML.
+    """
+    content_type = headers.get('content-type', '')
+    if not content_type or content_type.split(';')[0].strip().lower() in HTML_CONTENT_TYPES:
+        return None
+    return {'url': url, 'status': 'unsupported_content', 'error': f'Not an HTML page: {content_type}'}
+
 def scrape_webpage(url, timeout=10):
     """
     Scrape content from a webpage.
@@ -50,60 +94,24 @@ def scrape_webpage(url, timeout=10):
     :param timeout: Request timeout in seconds
     :return: Dictionary with scraped content
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
+    cached = _page_cache().get(url)
+    if cached is not None:
+        return cached
     try:
         print(f"🔍 Scraping: {url}")
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        
-        # Parse HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Extract basic information
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else "No title found"
-        
-        # Extract main content (try common content selectors)
-        content_selectors = [
-            'main', 'article', '.content', '#content', 
-            '.post-content', '.entry-content', 'div.content'
-        ]
-        
-        content_text = ""
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                content_text = content_elem.get_text(strip=True, separator=' ')
-                break
-        
-        # If no specific content area found, get body text
-        if not content_text:
-            body = soup.find('body')
-            if body:
-                content_text = body.get_text(strip=True, separator=' ')
-        
-        # Limit content length for display
-        if len(content_text) > 1000:
-            content_text = content_text[:1000] + "..."
-        
-        # Extract meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        meta_description = meta_desc.get('content', '') if meta_desc else ""
-        
-        return {
-            'url': url,
-            'title': title_text,
-            'meta_description': meta_description,
-            'content': content_text,
-            'status': 'success'
-        }
+        with _session.get(url, headers=SCRAPE_HEADERS, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            unsupported = _unsupported_content(url, response.headers)
+            if unsupported:
+                return unsupported
+            html = b''
+            for chunk in response.iter_content(65536):
+                html += chunk
+                if len(html) >= MAX_PAGE_BYTES:
+                    break
+        result = parse_webpage(url, html[:MAX_PAGE_BYTES])
+        _page_cache().set(url, result, expire=Config.SCRAPE_CACHE_TTL)
+        return result
         
     except requests.exceptions.Timeout:
         return {'url': url, 'status': 'timeout', 'error': 'Request timed out'}
@@ -114,6 +122,148 @@ def scrape_webpage(url, timeout=10):
     except Exception as e:
         return {'url': url, 'status': 'error', 'error': str(e)}
 
+async def scrape_webpages(urls, timeout=10, max_connections=32, max_queue_wait=5):
+    """
+    Scrape several webpages concurrently over one connection pool, so the
+    total time is about that of the slowest page rather than the sum.
+    Pages still waiting for a free connection after max_queue_wait seconds
+    are dropped, so a backlog of slow sites can't hold up the whole batch.
+    
+    :param urls: URLs to scrape
+    :param timeout: Request timeout in seconds, per page
+    :param max_connections: Most pages fetched at once
+    :param max_queue_wait: Longest wait in seconds for a free connection
+    :return: Dictionary of scraped content per URL, as scrape_webpage returns it
+    """
+    limits = httpx.Limits(max_connections=max_connections)
+    timeouts = httpx.Timeout(timeout, pool=max_queue_wait)
+    async with httpx.AsyncClient(headers=SCRAPE_HEADERS, timeout=timeouts, limits=limits,
+                                 follow_redirects=True) as client:
+        async def scrape(url):
+            # diskcache reads and writes SQLite files, so keep them off the event loop too
+            cached = await asyncio.to_thread(_page_cache().get, url)
+            if cached is not None:
+                return cached
+            try:
+                print(f"🔍 Scraping: {url}")
+                async with client.stream('GET', url) as response:
+                    response.raise_for_status()
+                    unsupported = _unsupported_content(url, response.headers)
+                    if unsupported:
+                        return unsupported
+                    html = b''
+                    async for chunk in response.aiter_bytes(65536):
+                        html += chunk
+                        if len(html) >= MAX_PAGE_BYTES:
+                            break
+                # Parsing is CPU-bound, so keep it off the event loop
+                result = await asyncio.to_thread(parse_webpage, url, html[:MAX_PAGE_BYTES])
+                await asyncio.to_thread(_page_cache().set, url, result, expire=Config.SCRAPE_CACHE_TTL)
+                return result
+            except httpx.PoolTimeout:
+                return {'url': url, 'status': 'dropped', 'error': 'Waited too long for a free connection'}
+            except httpx.TimeoutException:
+                return {'url': url, 'status': 'timeout', 'error': 'Request timed out'}
+            except httpx.ConnectError:
+                return {'url': url, 'status': 'connection_error', 'error': 'Connection failed'}
+            except httpx.HTTPStatusError as e:
+                return {'url': url, 'status': 'http_error', 'error': f'HTTP {e.response.status_code}'}
+            except Exception as e:
+                return {'url': url, 'status': 'error', 'error': str(e)}
+        
+        # Each page is fetched once, however many times it is listed
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*[scrape(url) for url in unique_urls])
+    return dict(zip(unique_urls, results))
+
+def parse_webpage(url, html):
+    """
+    Extract the title, meta description and main text of a fetched webpage.
+    
+    :param url: URL the page was fetched from
+    :param html: Raw HTML content
+    :return: Dictionary with scraped content
+    """
+    if HTMLParser is not None:
+        title_text, meta_description, content_text = _extract_selectolax(html)
+    else:
+        title_text, meta_description, content_text = _extract_bs4(html)
+    
+    # Limit content length for display
+    if len(content_text) > 1000:
+        content_text = content_text[:1000] + "..."
+    
+    return {
+        'url': url,
+        'title': title_text,
+        'meta_description': meta_description,
+        'content': content_text,
+        'status': 'success'
+    }
+
+# Common content selectors, tried in order before falling back to the body
+CONTENT_SELECTORS = [
+    'main', 'article', '.content', '#content', 
+    '.post-content', '.entry-content', 'div.content'
+]
+
+def _extract_selectolax(html):
+    """
+    Return the title, meta description and main text of a page using selectolax.
+    """
+    tree = HTMLParser(html)
+    
+    # Remove script and style elements
+    tree.strip_tags(['script', 'style'])
+    
+    title = tree.css_first('title')
+    title_text = title.text(strip=True) if title else ""
+    
+    meta_desc = tree.css_first('meta[name="description"]')
+    meta_description = (meta_desc.attributes.get('content') or '') if meta_desc else ""
+    
+    content_text = ""
+    for selector in CONTENT_SELECTORS:
+        content_elem = tree.css_first(selector)
+        if content_elem:
+            content_text = content_elem.text(separator=' ', strip=True)
+            break
+    
+    if not content_text and tree.body:
+        content_text = tree.body.text(separator=' ', strip=True)
+    
+    return title_text or "No title found", meta_description, content_text
+
+def _extract_bs4(html):
+    """
+    Return the title, meta description and main text of a page using BeautifulSoup.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+    
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else ""
+    
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    meta_description = meta_desc.get('content', '') if meta_desc else ""
+    
+    content_text = ""
+    for selector in CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            content_text = content_elem.get_text(strip=True, separator=' ')
+            break
+    
+    if not content_text:
+        body = soup.find('body')
+        if body:
+            content_text = body.get_text(strip=True, separator=' ')
+    
+    return title_text or "No title found", meta_description, content_text
+
 def display_scraped_content(scraped_data):
     """
     Display scraped content in a formatted way.
@@ -166,7 +316,9 @@ def main():
         
         print(f"Found {len(search_results)} results. Starting to scrape...\n")
         
-        # Scrape each result
+        # Scrape all results at once; they are usually on different sites
+        scraped_pages = asyncio.run(scrape_webpages([result['link'] for result in search_results]))
+        
         for i, result in enumerate(search_results, start=1):
             print(f"\n SEARCH RESULT #{i}")
             print(f" Original Link: {result['link']}")
@@ -174,13 +326,7 @@ def main():
             print(f" Snippet: {result['snippet']}")
             print()
             
-            # Scrape the webpage
-            scraped_data = scrape_webpage(result['link'])
-            display_scraped_content(scraped_data)
-            
-            # Add delay between requests to be respectful
-            if i < len(search_results):
-                time.sleep(2)
+            display_scraped_content(scraped_pages[result['link']])
     
     except ValueError as e:
         print(f" Configuration Error: {e}")
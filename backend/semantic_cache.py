@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    LRU of recent presentations keyed by prompt embedding, so prompts that
+    are worded differently but ask for the same deck reuse the earlier result.
+    Entries are also written to store, a diskcache.Cache of their own when
+    given, and restored from it on start so they outlive a restart.
+    """
+
+    def __init__(self, model_name=None, threshold=None, max_entries=None, ttl=None, store=None):
+        self.model_name = model_name or Config.SEMANTIC_CACHE_MODEL
+        self.threshold = threshold if threshold is not None else Config.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries or Config.SEMANTIC_CACHE_SIZE
+        self.ttl = ttl or Config.RESULT_CACHE_TTL
+        self._model = None
+        self._entries = OrderedDict()  # key -> (vector, pipeline, num_slides, result, expires_at)
+        self._store = store
+        self._lock = threading.Lock()
+        if store is not None:
+            self._load()
+
+    def _load(self):
+        """
+        Restore the most recent unexpired entries from the store.
+        """
+        now = time.time()
+        entries = []
+        for key in self._store.iterkeys():
+            entry = self._store.get(key)
+            if entry is not None and entry[4] > now:
+                entries.append((key, entry))
+        entries.sort(key=lambda item: item[1][4])
+        for key, entry in entries[-self.max_entries:]:
+            self._entries[key] = entry
+        if entries:
+            logger.info("Restored %s semantic cache entries", len(self._entries))
+
+    def embed(self, text):
+        """
+        Return the normalized embedding of a prompt. Loads the embedding model
+        on first use, since importing it is slow.
+        """
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                logger.info("Loading semantic cache model: %s", self.model_name)
+                self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(text.strip().lower(), normalize_embeddings=True)
+
+    def get(self, vector, pipeline, num_slides):
+        """
+        Return the cached result closest to the embedding for the same pipeline
+        and slide count, or None if nothing is similar enough.
+        """
+        now = time.time()
+        with self._lock:
+            keys, vectors = [], []
+            for key, (cached_vector, cached_pipeline, cached_slides, _, expires_at) in list(self._entries.items()):
+                if expires_at <= now:
+                    self._evict(key)
+                    continue
+                if cached_pipeline == pipeline and cached_slides == num_slides:
+                    keys.append(key)
+                    vectors.append(cached_vector)
+            if not keys:
+                return None
+            # Embeddings are normalized, so one matrix product gives every cosine similarity
+            scores = np.stack(vectors) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            logger.info("Semantic cache hit with similarity %.3f", scores[best])
+            return self._entries[keys[best]][3]
+
+    def add(self, key, vector, pipeline, num_slides, result):
+        """
+        Store a result under key, evicting the least recently used entry when full.
+        """
+        entry = (vector, pipeline, num_slides, result, time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if self._store is not None:
+                self._store.set(key, entry, expire=self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        del self._entries[key]
+        if self._store is not None:
+            self._store.delete(key)
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+_env = Environment(
+    loader=FileSystemLoader(_TEMPLATE_DIR),
+    autoescape=True,
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+
+
+def _template_version():
+    """
+    Return a short digest of every slide template, so caches of rendered
+    decks can tell when the templates changed.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for name in sorted(os.listdir(_TEMPLATE_DIR)):
+        digest.update(name.encode('utf-8'))
+        with open(os.path.join(_TEMPLATE_DIR, name), 'rb') as template:
+            digest.update(template.read())
+    return digest.hexdigest()
+
+
+TEMPLATE_VERSION = _template_version()
+
+# Colors and fonts land in CSS, where HTML escaping doesn't apply, so only
+# plain values are taken from the design
+_HEX_COLOR_RE = re.compile(r"^#[0-9a-fA-F]{3,8}$")
+_FONT_RE = re.compile(r"^[\w \-]+$")
+# Markdown fence lines around a reply that isn't in ```html blocks
+_FENCE_RE = re.compile(r"^\s*```\w*\s*$", re.M)
+# List markers the content creator sometimes leaves in bullet text
+_BULLET_RE = re.compile(r"^\s*(?:[•\-*–]|\d+[.)])\s*")
+
+# Fields the content creator owns; they override the designer's copy of the text
+_TEXT_FIELDS = ('title', 'subtitle', 'content_type', 'main_content', 'sources')
+
+_DEFAULT_THEME = {
+    'primary': '#667eea',
+    'accent': '#764ba2',
+    'background': 'rgba(255, 255, 255, 0.95)',
+    'title_font': "'Segoe UI', Tahoma, Geneva, Verdana, sans-serif",
+    'body_font': "'Segoe UI', Tahoma, Geneva, Verdana, sans-serif",
+}
+
+
+def _theme(design):
+    """
+    Build the template's colors and fonts from the design, keeping the
+    defaults for anything missing or not a plain value.
+    """
+    theme = dict(_DEFAULT_THEME)
+    colors = design.get('color_scheme')
+    if isinstance(colors, dict):
+        for key in ('primary', 'accent', 'background'):
+            value = colors.get(key)
+            if isinstance(value, str) and _HEX_COLOR_RE.match(value.strip()):
+                theme[key] = value.strip()
+    fonts = design.get('typography')
+    if isinstance(fonts, dict):
+        for key in ('title_font', 'body_font'):
+            value = fonts.get(key)
+            if isinstance(value, str) and _FONT_RE.match(value.strip()):
+                theme[key] = f"'{value.strip()}', {_DEFAULT_THEME[key]}"
+    # Validated above, so the font names' quotes can go into the CSS unescaped
+    return {key: Markup(value) for key, value in theme.items()}
+
+
+def _lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _bullets(text):
+    """
+    Split bullet point content into its items, whether they are on separate
+    lines or run together on one line.
+    """
+    lines = _lines(text)
+    if len(lines) == 1 and '•' in lines[0]:
+        lines = lines[0].split('•')
+    return [item for item in (_BULLET_RE.sub('', line).strip() for line in lines) if item]
+
+
+def _columns(text):
+    """
+    Split two column content into two lists of paragraphs, at a blank line
+    if there is one, otherwise halfway through its lines.
+    """
+    blocks = [block for block in re.split(r"\n\s*\n", text.strip()) if block.strip()]
+    if len(blocks) == 2:
+        return [_lines(block) for block in blocks]
+    lines = _lines(text)
+    if len(lines) < 2:
+        return None
+    half = (len(lines) + 1) // 2
+    return [lines[:half], lines[half:]]
+
+
+def _sources(sources):
+    if isinstance(sources, str):
+        sources = [sources]
+    if not isinstance(sources, list):
+        return []
+    return [str(source) for source in sources if source]
+
+
+def render_slides(design, content=None):
+    """
+    Render each slide of a design as a self-contained HTML page, returned as
+    one ```html code block per slide like the presentation generator writes
+    them. Slide text is taken from content when given.
+    Returns None if the design has no slides to render.
+    """
+    slides = design.get('slides') if isinstance(design, dict) else None
+    if not isinstance(slides, list) or not slides or not all(isinstance(slide, dict) for slide in slides):
+        return None
+
+    written = {}
+    if isinstance(content, dict) and isinstance(content.get('slides'), list):
+        written = {slide.get('slide_number'): slide for slide in content['slides'] if isinstance(slide, dict)}
+
+    theme = _theme(design)
+    template = _env.get_template('slide.html.j2')
+    blocks = []
+    for number, slide in enumerate(slides, 1):
+        text = written.get(slide.get('slide_number'), {})
+        slide = {**slide, **{field: text[field] for field in _TEXT_FIELDS if field in text}}
+        slide['sources'] = _sources(slide.get('sources'))
+        body = str(slide.get('main_content') or '')
+        content_type = slide.get('content_type')
+        html = template.render(
+            slide=slide,
+            number=slide.get('slide_number', number),
+            theme=theme,
+            bullets=_bullets(body) if content_type == 'bullet_points' else None,
+            columns=_columns(body) if content_type == 'two_column' else None,
+            paragraphs=[block.strip() for block in re.split(r"\n\s*\n", body) if block.strip()]
+        )
+        blocks.append(f"```html\n{html}\n```")
+
+    logger.info("Rendered %s slides from the design", len(blocks))
+    return "\n\n".join(blocks)
+
+
+def wrap_slides(response, design=None, first_number=1):
+    """
+    Wrap the slide markup in each ```html code block of a generator response
+    in the shared slide page, styled from the design's colors and fonts when
+    given, and return them as ```html code blocks again. Blocks that already
+    are whole pages are kept as they are. A response without any complete
+    ```html block is taken, minus its fence lines, as the markup of one slide.
+    first_number is the number of the response's first slide.
+    """
+    theme = _theme(design if isinstance(design, dict) else {})
+    template = _env.get_template('slide_base.html.j2')
+    markups = []
+    for part in response.split("```html")[1:]:
+        end = part.find("```")
+        if end != -1:
+            markups.append(part[:end].strip())
+    if not markups:
+        markup = _FENCE_RE.sub('', response).strip()
+        if markup:
+            markups.append(markup)
+    blocks = []
+    for number, markup in enumerate(markups, first_number):
+        if '<html' not in markup.lower():
+            markup = template.render(body_html=markup, number=number, theme=theme)
+        blocks.append(f"```html\n{markup}\n```")
+    return "\n\n".join(blocks)
@@ -15,13 +15,19 @@ warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="pydantic")
 
 # Configure logging before importing app modules
+from request_context import RequestIdFilter
+
+log_handlers = [
+    logging.StreamHandler(),
+    logging.FileHandler('ppt_generator.log')
+]
+for handler in log_handlers:
+    handler.addFilter(RequestIdFilter())
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('ppt_generator.log')
-    ]
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+    handlers=log_handlers
 )
 
 logger = logging.getLogger(__name__)
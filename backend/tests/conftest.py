@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The backend modules import each other by name, as app.py runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing agents configures CrewAI and LiteLLM; keep that offline
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+os.environ.setdefault('LITELLM_LOCAL_MODEL_COST_MAP', 'True')
+os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+os.environ.setdefault('CREWAI_DISABLE_TELEMETRY', 'true')
@@ -0,0 +1,375 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import litellm
+import orjson
+import pytest
+from crewai import Agent, Crew, LLM, Task
+
+from agents import (
+    FROM_CONTEXT, PPTCrew, ProviderUnavailableError, _compact_research, _generation_deadline,
+    is_retryable_error, retry_with_backoff
+)
+from config import Config
+from schemas import PresentationBlueprint, PresentationDesign
+
+
+class _StatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize('error', [
+    litellm.RateLimitError('slow down', 'gemini', 'gemini/test'),
+    litellm.ServiceUnavailableError('busy', 'gemini', 'gemini/test'),
+    _StatusError('Bad gateway', 502),
+    RuntimeError('The model is overloaded. Please try again later.'),
+    RuntimeError('Connection refused'),
+])
+def test_overload_and_network_errors_are_retried(error):
+    assert is_retryable_error(error)
+
+
+@pytest.mark.parametrize('error', [
+    litellm.BadRequestError('Invalid request', 'gemini/test', 'gemini'),
+    _StatusError('quota exceeded for this key', 403),
+    ValueError('Could not parse the plan'),
+])
+def test_other_errors_are_not_retried(error):
+    assert not is_retryable_error(error)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Record retry waits instead of sleeping through them.
+    """
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr('agents.asyncio.sleep', sleep)
+    monkeypatch.setattr('agents.time.sleep', waits.append)
+    monkeypatch.setattr(Config, 'MAX_RETRY_DELAY', 4)
+    return waits
+
+
+def _flaky(failures, error=RuntimeError('503 overloaded')):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return 'done'
+
+    return call, calls
+
+
+def test_async_retry_backs_off_until_the_call_succeeds(sleeps):
+    call, calls = _flaky(3)
+
+    @retry_with_backoff
+    async def generate():
+        return call()
+
+    assert asyncio.run(generate()) == 'done'
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+    assert all(Config.RETRY_DELAY <= wait <= Config.MAX_RETRY_DELAY for wait in sleeps)
+
+
+def test_retry_gives_up_after_max_retries(sleeps):
+    call, calls = _flaky(10)
+    with pytest.raises(RuntimeError, match='503'):
+        retry_with_backoff(call, max_retries=2)()
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_retry_raises_non_retryable_errors_at_once(sleeps):
+    call, calls = _flaky(1, ValueError('Could not parse the plan'))
+    with pytest.raises(ValueError):
+        retry_with_backoff(call)()
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize('remaining, retried', [(1, True), (-1, False)])
+def test_retry_never_waits_past_the_generation_deadline(sleeps, remaining, retried):
+    call, calls = _flaky(1)
+
+    @retry_with_backoff
+    async def generate():
+        return call()
+
+    async def run():
+        _generation_deadline.set(time.monotonic() + remaining)
+        return await generate()
+
+    if retried:
+        assert asyncio.run(run()) == 'done'
+        assert len(sleeps) == 1 and sleeps[0] <= remaining
+    else:
+        with pytest.raises(RuntimeError, match='503'):
+            asyncio.run(run())
+        assert sleeps == []
+
+
+def _crew(description='Write the slides', role='Writer', llm=None, output_pydantic=None, context=None):
+    agent = Agent(role=role, goal='Write', backstory='A writer', llm=llm or LLM(model=Config.CREWAI_MODEL))
+    task = Task(description=description, expected_output='Slides', agent=agent,
+                output_pydantic=output_pydantic, context=context)
+    return Crew(agents=[agent], tasks=[task])
+
+
+def test_crew_key_is_stable_for_identical_crews():
+    assert PPTCrew._crew_key(_crew()) == PPTCrew._crew_key(_crew())
+
+
+@pytest.mark.parametrize('changed', [
+    {'description': 'Write other slides'},
+    {'role': 'Editor'},
+    {'llm': LLM(model=Config.CREWAI_MODEL, temperature=0.1)},
+    {'llm': LLM(model=Config.CREWAI_MODEL, response_format=PresentationDesign)},
+    {'output_pydantic': PresentationBlueprint},
+])
+def test_crew_key_changes_with_every_input(changed):
+    assert PPTCrew._crew_key(_crew(**changed)) != PPTCrew._crew_key(_crew())
+
+
+def test_crew_key_includes_outputs_read_from_earlier_crews():
+    earlier = _crew().tasks[0]
+    earlier.output = SimpleNamespace(raw='first research')
+    first = PPTCrew._crew_key(_crew(context=[earlier]))
+    earlier.output = SimpleNamespace(raw='second research')
+    assert PPTCrew._crew_key(_crew(context=[earlier])) != first
+
+
+@pytest.fixture
+def crew(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'RESULT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'USE_SEMANTIC_CACHE', False)
+    monkeypatch.setattr(Config, 'HEDGE_REQUESTS', True)
+    monkeypatch.setattr(Config, 'HEDGE_MIN_SAMPLES', 4)
+    monkeypatch.setattr(Config, 'HEDGE_PERCENTILE', 0.5)
+    monkeypatch.setattr(Config, 'FALLBACK_MODEL', 'gemini/gemini-2.5-flash-lite')
+    crew = PPTCrew()
+    crew.fallback_agents = SimpleNamespace(model=Config.FALLBACK_MODEL)
+    return crew
+
+
+def test_hedge_delay_waits_for_enough_samples(crew):
+    key = crew._timing_key(5, False)
+    crew._generation_times[key].extend([10, 20, 30])
+    assert crew._hedge_delay(key) is None
+    crew._generation_times[key].append(40)
+    assert crew._hedge_delay(key) == 30
+
+
+def test_hedge_delay_is_kept_per_pipeline_and_deck_size(crew):
+    crew._generation_times[crew._timing_key(5, False)].extend([10] * 4)
+    assert crew._hedge_delay(crew._timing_key(5, True)) is None
+    assert crew._hedge_delay(crew._timing_key(20, False)) is None
+    assert crew._hedge_delay(crew._timing_key(4, False)) == 10
+
+
+def test_hedge_delay_is_off_without_a_distinct_fallback(crew, monkeypatch):
+    key = crew._timing_key(5, False)
+    crew._generation_times[key].extend([10] * 4)
+    monkeypatch.setattr(Config, 'FALLBACK_MODEL', Config.CREWAI_MODEL)
+    assert crew._hedge_delay(key) is None
+    monkeypatch.setattr(Config, 'FALLBACK_MODEL', 'gemini/gemini-2.5-flash-lite')
+    monkeypatch.setattr(Config, 'HEDGE_REQUESTS', False)
+    assert crew._hedge_delay(key) is None
+
+
+def _stub_kickoff(crew, monkeypatch):
+    """
+    Replace crew kickoffs with ones that wait for the returned event, and
+    count them.
+    """
+    release = asyncio.Event()
+    calls = []
+
+    async def kickoff(_):
+        calls.append(1)
+        await release.wait()
+        return SimpleNamespace(tasks_output=[], token_usage=None)
+
+    monkeypatch.setattr(crew, '_kickoff_crew', kickoff)
+    return release, calls
+
+
+def test_identical_concurrent_crews_share_one_run(crew, monkeypatch):
+    async def run():
+        release, calls = _stub_kickoff(crew, monkeypatch)
+        first = asyncio.ensure_future(crew._execute_crew(_crew()))
+        second = asyncio.ensure_future(crew._execute_crew(_crew()))
+        await asyncio.sleep(0)
+        release.set()
+        assert await first is await second
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_waiting_crew_takes_over_when_the_shared_run_is_cancelled(crew, monkeypatch):
+    async def run():
+        release, calls = _stub_kickoff(crew, monkeypatch)
+        first = asyncio.ensure_future(crew._execute_crew(_crew()))
+        while not calls:
+            await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(crew._execute_crew(_crew()))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert (await second).tasks_output == []
+        assert first.cancelled()
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_cancelling_a_waiting_crew_leaves_the_shared_run_alone(crew, monkeypatch):
+    async def run():
+        release, calls = _stub_kickoff(crew, monkeypatch)
+        first = asyncio.ensure_future(crew._execute_crew(_crew()))
+        while not calls:
+            await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(crew._execute_crew(_crew()))
+        await asyncio.sleep(0)
+        second.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert (await first).tasks_output == []
+        assert second.cancelled()
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_crew_keeps_its_slot_until_its_thread_is_done(crew, monkeypatch):
+    monkeypatch.setattr(Config, 'MAX_CONCURRENT_LLM', 1)
+    finish = threading.Event()
+    started = threading.Event()
+
+    def kickoff():
+        started.set()
+        finish.wait(5)
+        return 'done'
+
+    llm = SimpleNamespace(model='gemini/test')
+    blocking = SimpleNamespace(tasks=[SimpleNamespace(agent=SimpleNamespace(llm=llm))], kickoff=kickoff)
+
+    async def run():
+        first = asyncio.ensure_future(crew._kickoff_crew(blocking))
+        await asyncio.to_thread(started.wait, 5)
+        first.cancel()
+        await asyncio.sleep(0)
+        slots = crew._limits_for('gemini/test').slots
+        assert first.cancelled() and slots.locked()
+        finish.set()
+        for _ in range(100):
+            if not slots.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert not slots.locked()
+
+    asyncio.run(run())
+
+
+def test_reused_crew_output_fires_the_task_callbacks(crew, monkeypatch):
+    outputs = [SimpleNamespace(raw='research'), SimpleNamespace(raw='design')]
+
+    async def kickoff(_):
+        return SimpleNamespace(tasks_output=outputs, token_usage=None)
+
+    monkeypatch.setattr(crew, '_kickoff_crew', kickoff)
+    reported = []
+
+    def two_task_crew():
+        cached_crew = _crew()
+        first = cached_crew.tasks[0]
+        second = Task(description='Design the slides', expected_output='Design', agent=first.agent)
+        cached_crew.tasks.append(second)
+        first.callback = lambda output: reported.append(('research', output.raw))
+        second.callback = lambda output: reported.append(('design', output.raw))
+        return cached_crew
+
+    asyncio.run(crew._execute_crew(two_task_crew()))
+    assert reported == []
+    asyncio.run(crew._execute_crew(two_task_crew()))
+    assert reported == [('research', 'research'), ('design', 'design')]
+
+
+def test_chunks_carry_the_research_ahead_of_their_own_slides(crew, monkeypatch):
+    monkeypatch.setattr(Config, 'CONTENT_CHUNK_SIZE', 2)
+    research = '{"researched_topic": "Quantum computing"}'
+    research_task = SimpleNamespace(output=SimpleNamespace(raw=research))
+    writer = crew.agents.content_creator_agent()
+    run_tasks = []
+
+    async def execute(chunk_crew):
+        task = chunk_crew.tasks[0]
+        run_tasks.append(task)
+        return {'slides': [{'slide_number': len(run_tasks)}]}
+
+    monkeypatch.setattr(crew, '_execute_crew', execute)
+    plan = {'slides': [{'slide_number': number} for number in range(1, 5)]}
+    tasks, merged = asyncio.run(crew._run_chunked(
+        'content creation', 'Quantum computing', writer,
+        lambda source, research=FROM_CONTEXT: crew.tasks.content_creation_task(writer, source, research),
+        plan, [], research_task
+    ))
+    assert [slide['slide_number'] for slide in merged['slides']] == [1, 2]
+    first, second = (task.description for task in run_tasks)
+    shared = os.path.commonprefix([first, second])
+    assert research in shared
+    assert all(not task.context for task in run_tasks)
+
+
+def test_generation_past_the_deadline_is_reported_unavailable(crew, monkeypatch):
+    monkeypatch.setattr(Config, 'GENERATION_DEADLINE', 0.05)
+
+    async def slow(*_):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(crew, '_generate_with_fallback', slow)
+    with pytest.raises(ProviderUnavailableError, match='did not finish'):
+        asyncio.run(crew.acreate_presentation('Quantum computing'))
+
+
+def test_compact_research_keeps_the_most_important_themes_and_clips_text(monkeypatch):
+    monkeypatch.setattr(Config, 'RESEARCH_MAX_THEMES', 2)
+    monkeypatch.setattr(Config, 'RESEARCH_MAX_FACTS', 1)
+    monkeypatch.setattr(Config, 'RESEARCH_ITEM_CHARS', 20)
+    research = {
+        'researched_topic': 'Quantum computing',
+        'main_themes': [
+            {'theme': 'History', 'importance': 3, 'content': 'x' * 50},
+            {'theme': 'Qubits', 'importance': 9, 'key_points': [str(n) for n in range(8)]},
+            {'theme': 'Unranked'},
+            'not a theme',
+            {'theme': 'Uses', 'importance': 7},
+        ],
+        'key_facts': [{'fact': 'First', 'context': 'c'}, {'fact': 'Second'}],
+        'extra': 'dropped',
+    }
+    compact = orjson.loads(_compact_research(SimpleNamespace(raw=orjson.dumps(research).decode())))
+    assert [theme['theme'] for theme in compact['main_themes']] == ['Qubits', 'Uses']
+    assert compact['main_themes'][0]['key_points'] == ['0', '1', '2', '3', '4']
+    assert compact['key_facts'] == [{'fact': 'First', 'context': 'c'}]
+    assert 'extra' not in compact
+    clipped = orjson.loads(_compact_research({'main_themes': [research['main_themes'][0]]}))
+    assert clipped['main_themes'][0]['content'] == 'x' * 17 + '...'
+
+
+def test_compact_research_is_none_for_results_that_are_not_json():
+    assert _compact_research(SimpleNamespace(raw='Research notes, not JSON')) is None
@@ -0,0 +1,19 @@
+import pytest
+
+from project_manager import PPTProjectManager
+
+
+@pytest.mark.parametrize('response', [
+    '```html\n<h1>Slide</h1>\n```',
+    '  ```\n<h1>Slide</h1>\n```  ',
+    '```HTML<h1>Slide</h1>```',
+    '<h1>Slide</h1>',
+])
+def test_clean_html_code_block_strips_the_outer_fences(response):
+    assert PPTProjectManager.clean_html_code_block(response) == '<h1>Slide</h1>'
+
+
+def test_clean_html_code_block_keeps_inner_fences_and_non_strings():
+    inner = '<pre>```code```</pre>'
+    assert PPTProjectManager.clean_html_code_block(f'```html\n{inner}\n```') == inner
+    assert PPTProjectManager.clean_html_code_block(None) is None
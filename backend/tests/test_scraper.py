@@ -0,0 +1,119 @@
+import asyncio
+import functools
+
+import httpx
+import pytest
+from bs4 import BeautifulSoup
+
+import scraper
+from config import Config
+
+PAGE = (
+    b'<html><head><title>Qubits</title><meta name="description" content="All about qubits">'
+    b'<style>p { color: red }</style></head>'
+    b'<body><nav>Menu</nav><main><p>Superposition</p><script>track()</script></main></body></html>'
+)
+
+
+@pytest.fixture
+def pages(tmp_path, monkeypatch):
+    """
+    Serve scrapes from a dict of URL to response, with a fresh page cache,
+    and record the URLs requested.
+    """
+    monkeypatch.setattr(Config, 'RESULT_CACHE_DIR', str(tmp_path))
+    scraper._page_cache.cache_clear()
+    responses = {}
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return responses[str(request.url)]
+
+    client = functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(scraper.httpx, 'AsyncClient', client)
+    yield responses, requested
+    scraper._page_cache().close()
+    scraper._page_cache.cache_clear()
+
+
+def test_scrape_webpages_returns_each_page_or_its_error(pages):
+    responses, _ = pages
+    responses['https://a.test/'] = httpx.Response(200, content=PAGE, headers={'content-type': 'text/html'})
+    responses['https://b.test/'] = httpx.Response(404)
+    results = asyncio.run(scraper.scrape_webpages(['https://a.test/', 'https://b.test/']))
+    assert results['https://a.test/']['status'] == 'success'
+    assert results['https://a.test/']['title'] == 'Qubits'
+    assert results['https://b.test/'] == {'url': 'https://b.test/', 'status': 'http_error', 'error': 'HTTP 404'}
+
+
+@pytest.fixture(params=['selectolax', 'bs4'])
+def extract(request, monkeypatch):
+    """
+    Each page extractor; BeautifulSoup is imported as the fallback import would.
+    """
+    if request.param == 'selectolax':
+        return scraper._extract_selectolax
+    monkeypatch.setattr(scraper, 'BeautifulSoup', BeautifulSoup, raising=False)
+    return scraper._extract_bs4
+
+
+def test_extractors_read_the_title_description_and_main_text(extract):
+    assert extract(PAGE) == ('Qubits', 'All about qubits', 'Superposition')
+
+
+def test_extractors_fall_back_to_the_body(extract):
+    assert extract(b'<html><body><p>Only body</p></body></html>') == ('No title found', '', 'Only body')
+
+
+def test_parse_webpage_clips_long_content():
+    page = b'<html><body><main>' + b'x' * 1500 + b'</main></body></html>'
+    result = scraper.parse_webpage('https://a.test/', page)
+    assert result['status'] == 'success'
+    assert result['content'] == 'x' * 1000 + '...'
+
+
+@pytest.mark.parametrize('content_type, supported', [
+    ('', True),
+    ('text/html; charset=utf-8', True),
+    ('Application/XHTML+XML', True),
+    ('application/pdf', False),
+])
+def test_unsupported_content_only_rejects_non_html(content_type, supported):
+    headers = {'content-type': content_type} if content_type else {}
+    result = scraper._unsupported_content('https://a.test/', headers)
+    assert (result is None) == supported
+    if not supported:
+        assert result['status'] == 'unsupported_content'
+
+
+def test_scrape_webpages_stops_reading_after_max_page_bytes(pages, monkeypatch):
+    monkeypatch.setattr(scraper, 'MAX_PAGE_BYTES', 100)
+    read = []
+    monkeypatch.setattr(scraper, 'parse_webpage', lambda url, html: read.append(html) or {'url': url})
+    responses, _ = pages
+    responses['https://a.test/'] = httpx.Response(200, content=b'x' * 1000, headers={'content-type': 'text/html'})
+    responses['https://b.test/'] = httpx.Response(200, content=b'%PDF', headers={'content-type': 'application/pdf'})
+    results = asyncio.run(scraper.scrape_webpages(['https://a.test/', 'https://b.test/']))
+    assert read == [b'x' * 100]
+    assert results['https://b.test/']['status'] == 'unsupported_content'
+
+
+def test_scrape_webpages_fetches_a_repeated_url_once(pages):
+    responses, requested = pages
+    responses['https://a.test/'] = httpx.Response(200, content=PAGE)
+    results = asyncio.run(scraper.scrape_webpages(['https://a.test/', 'https://a.test/']))
+    assert list(results) == ['https://a.test/']
+    assert requested == ['https://a.test/']
+
+
+def test_scraped_pages_are_served_from_the_cache(pages):
+    responses, requested = pages
+    responses['https://a.test/'] = httpx.Response(200, content=PAGE)
+    responses['https://b.test/'] = httpx.Response(503)
+    urls = ['https://a.test/', 'https://b.test/']
+    first = asyncio.run(scraper.scrape_webpages(urls))
+    second = asyncio.run(scraper.scrape_webpages(urls))
+    assert second == first
+    # Failed scrapes aren't cached, so they are tried again
+    assert sorted(requested) == ['https://a.test/', 'https://b.test/', 'https://b.test/']
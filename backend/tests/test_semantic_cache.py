@@ -0,0 +1,46 @@
+import time
+
+import diskcache
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+
+def _unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _cache(**kwargs):
+    return SemanticCache(model_name='unused', threshold=0.9, max_entries=10, ttl=60, **kwargs)
+
+
+def test_get_returns_the_closest_result_above_the_threshold():
+    cache = _cache()
+    cache.add('a', _unit(1, 0, 0), 'model|single', 5, 'deck a')
+    cache.add('b', _unit(0, 1, 0), 'model|single', 5, 'deck b')
+    assert cache.get(_unit(0.1, 1, 0), 'model|single', 5) == 'deck b'
+    assert cache.get(_unit(1, 1, 0), 'model|single', 5) is None
+
+
+def test_get_only_matches_the_same_pipeline_and_slide_count():
+    cache = _cache()
+    cache.add('a', _unit(1, 0), 'model|single', 5, 'deck a')
+    assert cache.get(_unit(1, 0), 'model|multi', 5) is None
+    assert cache.get(_unit(1, 0), 'model|single', 6) is None
+    assert cache.get(_unit(1, 0), 'model|single', 5) == 'deck a'
+
+
+def test_get_skips_and_evicts_expired_entries(monkeypatch):
+    cache = _cache()
+    cache.add('a', _unit(1, 0), 'model|single', 5, 'deck a')
+    now = time.time()
+    monkeypatch.setattr('semantic_cache.time.time', lambda: now + 120)
+    assert cache.get(_unit(1, 0), 'model|single', 5) is None
+    assert 'a' not in cache._entries
+
+
+def test_entries_survive_a_restart_through_the_store(tmp_path):
+    with diskcache.Cache(str(tmp_path)) as store:
+        _cache(store=store).add('a', _unit(1, 0), 'model|single', 5, 'deck a')
+        assert _cache(store=store).get(_unit(1, 0), 'model|single', 5) == 'deck a'
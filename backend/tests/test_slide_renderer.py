@@ -0,0 +1,76 @@
+import re
+
+from slide_renderer import render_slides, wrap_slides
+
+
+def _blocks(response):
+    return re.findall(r"```html\n(.*?)\n```", response, re.S)
+
+
+DESIGN = {
+    'color_scheme': {'primary': '#123456', 'accent': 'red; } body { x', 'background': '#fff'},
+    'typography': {'title_font': 'Roboto', 'body_font': 'Arial</style>'},
+    'slides': [
+        {'slide_number': 1, 'title': 'Planned title', 'content_type': 'bullet_points',
+         'main_content': '• One • Two'},
+        {'slide_number': 2, 'title': 'Compare', 'content_type': 'two_column',
+         'main_content': 'Left side\n\nRight side'},
+    ],
+}
+
+
+def test_render_slides_returns_none_without_slides():
+    assert render_slides({}) is None
+    assert render_slides({'slides': []}) is None
+    assert render_slides({'slides': ['not a slide']}) is None
+
+
+def test_render_slides_prefers_written_content_and_escapes_it():
+    content = {'slides': [{'slide_number': 1, 'title': '<b>Written</b>', 'main_content': '• Kept'}]}
+    blocks = _blocks(render_slides(DESIGN, content))
+    assert len(blocks) == 2
+    assert '&lt;b&gt;Written&lt;/b&gt;' in blocks[0]
+    assert 'Planned title' not in blocks[0]
+    assert 'Kept' in blocks[0]
+
+
+def test_render_slides_splits_bullets_and_columns():
+    blocks = _blocks(render_slides(DESIGN))
+    assert 'One' in blocks[0] and 'Two' in blocks[0]
+    assert '•' not in blocks[0]
+    assert 'Left side' in blocks[1] and 'Right side' in blocks[1]
+
+
+def test_render_slides_only_takes_plain_colors_and_fonts():
+    block = _blocks(render_slides(DESIGN))[0]
+    assert '#123456' in block
+    assert "'Roboto'" in block
+    assert 'body { x' not in block
+    assert 'Arial</style>' not in block
+
+
+def test_wrap_slides_wraps_each_fragment_in_a_numbered_page():
+    response = "Intro\n```html\n<h1>A</h1>\n```\ntext\n```html\n<h1>B</h1>\n```"
+    blocks = _blocks(wrap_slides(response, DESIGN, first_number=3))
+    assert len(blocks) == 2
+    assert all('<html' in block.lower() for block in blocks)
+    assert '<h1>A</h1>' in blocks[0] and '<h1>B</h1>' in blocks[1]
+    assert '<title>Slide 3</title>' in blocks[0]
+    assert '<title>Slide 4</title>' in blocks[1]
+    assert '#123456' in blocks[0]
+
+
+def test_wrap_slides_keeps_whole_pages_and_drops_unterminated_blocks():
+    page = "<!DOCTYPE html><html><body>Done</body></html>"
+    response = f"```html\n{page}\n```\n```html\n<p>cut off"
+    assert _blocks(wrap_slides(response)) == [page]
+
+
+def test_wrap_slides_takes_an_unfenced_reply_as_one_slide():
+    blocks = _blocks(wrap_slides('<div class="slide">Only</div>', DESIGN, first_number=2))
+    assert len(blocks) == 1
+    assert '<div class="slide">Only</div>' in blocks[0]
+    assert '<title>Slide 2</title>' in blocks[0]
+    fenced = _blocks(wrap_slides('```\n<p>Bare fence</p>\n```'))
+    assert len(fenced) == 1 and '<p>Bare fence</p>' in fenced[0] and '```' not in fenced[0]
+    assert wrap_slides('  ') == ''